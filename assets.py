@@ -0,0 +1,207 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pygame
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+def find_images(directory):
+    """
+    Return the file paths of every image under a directory, in a stable order.
+    """
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        paths.extend(os.path.join(root, name).replace(os.sep, '/') for name in sorted(files)
+                     if name.lower().endswith(IMAGE_EXTENSIONS))
+    return paths
+
+
+def _decode_image(path):
+    """
+    Decode an image file into an unconverted surface. Runs in a loader thread.
+    """
+    start = time.perf_counter()
+    surface = pygame.image.load(path)
+    return surface, time.perf_counter() - start
+
+
+def _decode_sound(path):
+    """
+    Decode a sound file. Runs in a loader thread.
+    """
+    start = time.perf_counter()
+    sound = pygame.mixer.Sound(path)
+    return sound, time.perf_counter() - start
+
+
+class AssetManager:
+    """
+    Central cache for image assets.
+    Every image is decoded and converted only once, and the resulting Surface is
+    shared by all sprites that use it. Hit and miss counters make it easy to
+    confirm that no image is loaded from disk during gameplay.
+    """
+    def __init__(self):
+        """
+        Initialize the asset manager.
+        Attributes:
+            images (dict): Cached surfaces keyed by (path, alpha, size, angle).
+            decoded (dict): Unconverted surfaces decoded by the loader threads, by path.
+            sounds (dict): Decoded sounds, by path.
+            atlases (dict): Pre-rotated sprite tables keyed by (path, angle, steps).
+            load_times (dict): Seconds spent decoding and converting every preloaded asset, by path.
+            hits (int): Number of lookups served from the cache.
+            misses (int): Number of lookups that had to load from disk.
+        """
+        self.images = {}
+        self.decoded = {}
+        self.sounds = {}
+        self.atlases = {}
+        self.load_times = {}
+        self.hits = 0
+        self.misses = 0
+
+    def image(self, path, alpha=True, size=None, angle=0):
+        """
+        Return the surface for an image, loading it on the first request.
+        Args:
+            path (str): File path of the image.
+            alpha (bool, optional): Use convert_alpha instead of convert. Defaults to True.
+            size (tuple, optional): Scale the image to this (width, height). Defaults to None.
+            angle (float, optional): Rotate the image by this many degrees. Defaults to 0.
+        Returns:
+            pygame.Surface: The shared, converted surface.
+        """
+        key = (path, alpha, size, angle)
+        surface = self.images.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self._load(path, alpha)
+        if size:
+            surface = pygame.transform.scale(surface, size)
+        if angle:
+            surface = pygame.transform.rotate(surface, angle)
+        self.images[key] = surface
+        return surface
+
+    def _load(self, path, alpha):
+        """
+        Decode an image from disk and convert it to the display format.
+        The plain converted file is cached as well, so scaled or rotated variants
+        of the same file share a single decode.
+        """
+        key = (path, alpha, None, 0)
+        surface = self.images.get(key)
+        if surface is None:
+            surface = self.decoded.get(path)
+            if surface is None:
+                surface = pygame.image.load(path)
+            surface = surface.convert_alpha() if alpha else surface.convert()
+            self.images[key] = surface
+        return surface
+
+    def preload(self, paths):
+        """
+        Load a list of images into the cache ahead of gameplay.
+        Preloading does not count towards the hit and miss counters.
+        Args:
+            paths (list): File paths of the images to load.
+        """
+        for path in paths:
+            self._load(path, True)
+
+    def load_parallel(self, images, sounds=(), workers=4, progress=None):
+        """
+        Decode images and sounds on a pool of threads and convert the images as they arrive.
+        File reads and decoding run in the threads; conversion to the display
+        format needs the display and is done on the calling thread, which also
+        reports progress between assets so a loading screen can be drawn.
+        Args:
+            images (list): File paths of the images to load.
+            sounds (list, optional): File paths of the sounds to decode. Defaults to ().
+            workers (int, optional): Number of loader threads. Defaults to 4.
+            progress (callable, optional): Called with (loaded, total, path) after every asset.
+                Defaults to None.
+        Returns:
+            float: Seconds spent loading all assets.
+        """
+        start = time.perf_counter()
+        total = len(images) + len(sounds)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_decode_image, path): path for path in images}
+            futures.update({executor.submit(_decode_sound, path): path for path in sounds})
+            for loaded, future in enumerate(as_completed(futures), 1):
+                path = futures[future]
+                asset, seconds = future.result()
+                if isinstance(asset, pygame.Surface):
+                    convert_start = time.perf_counter()
+                    self.decoded[path] = asset
+                    self._load(path, True)
+                    seconds += time.perf_counter() - convert_start
+                else:
+                    self.sounds[path] = asset
+                self.load_times[path] = seconds
+                if progress:
+                    progress(loaded, total, path)
+        return time.perf_counter() - start
+
+    def sound(self, path):
+        """
+        Return the decoded sound of a file, decoding it on the first request.
+        """
+        sound = self.sounds.get(path)
+        if sound is None:
+            sound = self.sounds[path] = pygame.mixer.Sound(path)
+        return sound
+
+    def rotation_atlas(self, path, steps, angle=0):
+        """
+        Return an image pre-rotated to evenly spaced angles, building the table on the first request.
+        Entry i is the image turned counterclockwise by i * 360 / steps degrees, so
+        turning a sprite during gameplay is a table lookup instead of a new rotation.
+        Args:
+            path (str): File path of the image.
+            steps (int): Number of angles in a full turn.
+            angle (float, optional): Rotation applied to the image before the table is built. Defaults to 0.
+        Returns:
+            list: The rotated surfaces.
+        """
+        key = (path, angle, steps)
+        atlas = self.atlases.get(key)
+        if atlas is None:
+            base = self.image(path, angle=angle)
+            atlas = [pygame.transform.rotozoom(base, step * 360 / steps, 1) for step in range(steps)]
+            self.atlases[key] = atlas
+        return atlas
+
+    def preload_rotations(self, sprites, steps):
+        """
+        Build the rotation atlases of a list of sprites ahead of gameplay.
+        Args:
+            sprites (list): (path, angle) pairs of the sprites that rotate.
+            steps (int): Number of angles in a full turn.
+        """
+        for path, angle in sprites:
+            self.rotation_atlas(path, steps, angle)
+
+    def atlas_bytes(self):
+        """
+        Return the memory used by the pixels of all rotation atlases, in bytes.
+        """
+        return sum(surface.get_bytesize() * surface.get_width() * surface.get_height()
+                   for atlas in self.atlases.values() for surface in atlas)
+
+    def stats(self):
+        """
+        Return cache statistics.
+        Returns:
+            dict: Number of cached surfaces, hits, misses, and the number and size in bytes
+                of the rotation atlases.
+        """
+        return {'cached': len(self.images), 'hits': self.hits, 'misses': self.misses,
+                'atlases': len(self.atlases), 'atlas_bytes': self.atlas_bytes()}
@@ -0,0 +1,181 @@
+from bisect import bisect_right
+import numpy as np
+from paths import circle_interval
+
+
+STACKING_RULES = {
+    'max': max,
+    'add': sum,
+}
+
+
+def stack_effects(effects, stacking):
+    """
+    Combine overlapping effects into one value per effect name.
+    Args:
+        effects (list): (name, amount) pairs.
+        stacking (dict): Stacking rule for each effect name, a key of STACKING_RULES.
+            Effects without a rule use 'max', so only the strongest applies.
+    Returns:
+        dict: Combined amount for each effect name.
+    """
+    grouped = {}
+    for name, amount in effects:
+        grouped.setdefault(name, []).append(amount)
+    return {name: STACKING_RULES[stacking.get(name, 'max')](amounts) for name, amounts in grouped.items()}
+
+
+class AuraField:
+    """
+    Precomputed lookup of the auras covering each enemy path.
+    Every path is split into intervals of distance along it, each holding the
+    auras active there. The field is rebuilt only after a tower is placed or
+    upgraded, so enemies look up their effects with a binary search on their
+    distance along the path instead of scanning the towers every frame.
+    """
+    def __init__(self, level):
+        """
+        Initialize the aura field.
+        Args:
+            level: Reference to the level owning the towers and the compiled paths.
+        Attributes:
+            intervals (dict): For every path id, the interval starts, ends, raw effects
+                and stacked effects along the path.
+            dirty (bool): True when the towers changed since the last rebuild.
+            version (int): Number of rebuilds so far, used by callers caching derived tables.
+        """
+        self.level = level
+        self.stacking = level.game.settings.aura_stacking
+        self.intervals = {}
+        self.dirty = True
+        self.version = 0
+
+    def invalidate(self):
+        """
+        Mark the field for a rebuild. Called when the tower layout changes.
+        """
+        self.dirty = True
+
+    def rebuild(self):
+        """
+        Drop the intervals of every path; they are rasterized again on the next lookup.
+        """
+        self.intervals = {}
+        self.dirty = False
+        self.version += 1
+
+    def _path_intervals(self, path_id):
+        if self.dirty:
+            self.rebuild()
+        intervals = self.intervals.get(path_id)
+        if intervals is None:
+            sources = [tower for tower in self.level.towers if tower.aura]
+            intervals = self._build_path(self.level.paths.compiled[path_id], sources)
+            self.intervals[path_id] = intervals
+        return intervals
+
+    def _build_path(self, path, sources):
+        covers = []
+        for segment, (start, direction, length) in enumerate(zip(path.points, path.directions, path.lengths)):
+            offset = path.cumulative[segment]
+            for tower in sources:
+                interval = circle_interval(start, direction, length, tower.rect.center, tower.tower_range)
+                if interval:
+                    covers.append((offset + interval[0], offset + interval[1],
+                                   (tower.aura['effect'], tower.aura['amount'])))
+        return self._split(covers)
+
+    def _split(self, covers):
+        """
+        Split overlapping aura intervals into disjoint ones with the stacked effects.
+        """
+        starts, ends, raw, stacked = [], [], [], []
+        points = sorted({point for low, high, _ in covers for point in (low, high)})
+        for low, high in zip(points, points[1:]):
+            middle = (low + high) / 2
+            effects = [effect for cover_low, cover_high, effect in covers if cover_low <= middle <= cover_high]
+            if not effects:
+                continue
+            if starts and ends[-1] == low and raw[-1] == effects:
+                ends[-1] = high
+                continue
+            starts.append(low)
+            ends.append(high)
+            raw.append(effects)
+            stacked.append(stack_effects(effects, self.stacking))
+        return starts, ends, raw, stacked
+
+    def _lookup(self, path, distance):
+        starts, ends, raw, stacked = self._path_intervals(self.level.paths.register(path))
+        index = bisect_right(starts, distance) - 1
+        if index < 0 or distance > ends[index]:
+            return None
+        return raw[index], stacked[index]
+
+    def effect_table(self, name):
+        """
+        Flatten the stacked amounts of one effect over all paths for vectorized lookups.
+        Intervals are keyed like the level's PathTable: base of the path plus distance.
+        Args:
+            name (str): Effect name, e.g. 'slow'.
+        Returns:
+            tuple: Sorted interval starts, interval ends and amounts, as NumPy arrays.
+        """
+        paths = self.level.paths
+        starts, ends, amounts = [], [], []
+        for path_id, base in enumerate(paths.base.tolist()):
+            path_starts, path_ends, _, stacked = self._path_intervals(path_id)
+            for low, high, effects in zip(path_starts, path_ends, stacked):
+                if name in effects:
+                    starts.append(base + low)
+                    ends.append(base + high)
+                    amounts.append(effects[name])
+        return np.array(starts), np.array(ends), np.array(amounts)
+
+    def effects_at(self, path, distance):
+        """
+        Return the stacked aura effects at a point of a path.
+        Args:
+            path (list): The path the enemy follows.
+            distance (float): Distance of the enemy from the start of the path.
+        Returns:
+            dict: Combined amount for each active effect name.
+        """
+        found = self._lookup(path, distance)
+        return found[1] if found else {}
+
+    def raw_effects_at(self, path, distance):
+        """
+        Return the unstacked (name, amount) aura effects at a point of a path.
+        """
+        found = self._lookup(path, distance)
+        return found[0] if found else []
+
+
+class StatusEffects:
+    """
+    Timed debuffs applied to a single enemy, such as a slow from a freezing hit.
+    """
+    def __init__(self):
+        self.active = []
+
+    def apply(self, name, amount, expires_at):
+        """
+        Add a debuff.
+        Args:
+            name (str): Effect name, e.g. 'slow'.
+            amount (float): Strength of the effect.
+            expires_at (int): Game time in milliseconds when the effect ends.
+        """
+        self.active.append((name, amount, expires_at))
+
+    def current(self, now):
+        """
+        Drop expired debuffs and return the remaining ones.
+        Args:
+            now (int): Current game time in milliseconds.
+        Returns:
+            list: (name, amount) pairs of the active debuffs.
+        """
+        self.active = [effect for effect in self.active if effect[2] > now]
+        return [(name, amount) for name, amount, _ in self.active]
@@ -0,0 +1,255 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+
+class GreedyBuilder:
+    """
+    Build strategy that spends money as soon as it can.
+    Towers are bought in the order of `types` on the free cells that reach the
+    most path length, according to the coverage tables of the compiled map.
+    Once `max_towers` towers stand, money goes to upgrading them in placement order.
+    """
+    def __init__(self, types=('basic', 'sniper', 'freezer'), max_towers=8, upgrades=True):
+        """
+        Initialize the strategy.
+        Args:
+            types (tuple, optional): Tower types bought in turn. Defaults to basic, sniper and freezer.
+            max_towers (int, optional): Number of towers to build. Defaults to 8.
+            upgrades (bool, optional): Whether towers are upgraded once all are built. Defaults to True.
+        """
+        self.types = types
+        self.max_towers = max_towers
+        self.upgrades = upgrades
+        self.spots = None
+
+    def _rank_spots(self, game):
+        game_map = game.settings.map
+        coverage = np.asarray(game_map.coverage_length).sum(axis=(2, 3))
+        cells = np.argwhere(game_map.buildable).tolist()
+        cells.sort(key=lambda cell: -coverage[cell[0], cell[1]])
+        return [game.grid.get_cell_center(tuple(cell)) for cell in cells]
+
+    def __call__(self, game):
+        settings = game.settings
+        towers = game.level.towers
+        if len(towers) < self.max_towers:
+            if settings.starting_money < settings.tower_cost:
+                return
+            if self.spots is None:
+                self.spots = self._rank_spots(game)
+            while self.spots and not game.grid.is_spot_available(self.spots[0]):
+                self.spots.pop(0)
+            if self.spots:
+                game.level.attempt_place_tower(self.spots.pop(0), self.types[len(towers) % len(self.types)])
+        elif self.upgrades:
+            for tower in towers:
+                if tower.level < 2 and settings.starting_money >= tower.upgrade_cost_at(settings, tower.level + 1):
+                    tower.upgrade(tower)
+                    break
+
+
+STRATEGIES = {
+    'greedy': GreedyBuilder,
+}
+
+
+def simulate(job):
+    """
+    Play one seeded game without a display. Runs in a worker process.
+    Args:
+        job (dict): 'seed', 'layout', 'strategy' (name and keyword arguments, or None),
+            'overrides' of Settings attributes and 'max_ticks'.
+    Returns:
+        dict: Outcome of the game: whether it was won, its ticks, kills, leaks, final money,
+            money after every wave, and the damage dealt by each tower type.
+    """
+    from headless import HeadlessGame
+    from settings import Settings
+    settings = Settings()
+    for name, value in job['overrides'].items():
+        if name == 'map_file':
+            settings.load_map(value)
+        else:
+            setattr(settings, name, value)
+    strategy = None
+    if job['strategy']:
+        name, options = job['strategy']
+        strategy = STRATEGIES[name](**options)
+    with contextlib.redirect_stdout(io.StringIO()):
+        game = HeadlessGame(seed=job['seed'], layout=job['layout'], settings=settings, strategy=strategy)
+        result = game.run(job['max_ticks'])
+    damage = {}
+    for tower in result['towers']:
+        damage[tower['type']] = damage.get(tower['type'], 0) + tower['damage']
+    return {
+        'seed': job['seed'],
+        'won': result['won'],
+        'ticks': result['ticks'],
+        'kills': result['kills'],
+        'leaks': result['leaks'],
+        'money': result['money'],
+        'money_curve': [wave['money'] for wave in result['waves']],
+        'towers': len(result['towers']),
+        'damage': damage,
+    }
+
+
+def run_batch(jobs, workers=None):
+    """
+    Play a batch of games on a pool of worker processes.
+    Games are independent and only their small result dicts travel back, so
+    throughput grows with the number of cores. The results do not depend on
+    the number of workers.
+    Args:
+        jobs (list): Jobs as taken by simulate.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+    Returns:
+        list: Results of the jobs, in job order.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [simulate(job) for job in jobs]
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(simulate, jobs, chunksize=chunksize))
+
+
+def percentile(values, fraction):
+    """
+    Return the value below which the given fraction of the values lies.
+    """
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def summarize(results):
+    """
+    Aggregate the results of a batch.
+    Args:
+        results (list): Results as returned by simulate.
+    Returns:
+        dict: Win rate, leak and money statistics, the mean money after every wave
+            over the games that got that far, and the share of damage of each tower type.
+    """
+    leaks = [result['leaks'] for result in results]
+    waves = max(len(result['money_curve']) for result in results)
+    money_curve = []
+    for wave in range(waves):
+        reached = [result['money_curve'][wave] for result in results if len(result['money_curve']) > wave]
+        money_curve.append(statistics.fmean(reached))
+    damage = {}
+    for result in results:
+        for name, amount in result['damage'].items():
+            damage[name] = damage.get(name, 0) + amount
+    total_damage = sum(damage.values()) or 1
+    return {
+        'runs': len(results),
+        'win_rate': sum(result['won'] for result in results) / len(results),
+        'leaks_mean': statistics.fmean(leaks),
+        'leaks_p90': percentile(leaks, 0.9),
+        'money_mean': statistics.fmean(result['money'] for result in results),
+        'ticks_mean': statistics.fmean(result['ticks'] for result in results),
+        'money_curve': money_curve,
+        'damage_share': {name: amount / total_damage for name, amount in sorted(damage.items())},
+    }
+
+
+def print_summaries(summaries):
+    """
+    Print one row per configuration, followed by the money curves.
+    """
+    print(f"{'Configuration':<28} {'Runs':>5} {'Win %':>6} {'Leaks':>6} {'P90':>4} {'Money':>7} {'Ticks':>7}  Damage share")
+    for label, summary in summaries.items():
+        shares = ' '.join(f"{name} {share * 100:.0f}%" for name, share in summary['damage_share'].items())
+        print(f"{label:<28} {summary['runs']:>5} {summary['win_rate'] * 100:>6.1f} {summary['leaks_mean']:>6.2f} "
+              f"{summary['leaks_p90']:>4} {summary['money_mean']:>7.0f} {summary['ticks_mean']:>7.0f}  {shares}")
+    print("Mean money after each wave:")
+    for label, summary in summaries.items():
+        print(f"{label:<28} " + ' '.join(f"{money:>6.0f}" for money in summary['money_curve']))
+
+
+def parse_assignment(value):
+    """
+    Parse a NAME=VALUE argument; the value is read as JSON when possible.
+    """
+    name, _, raw = value.partition('=')
+    if not name or not raw:
+        raise argparse.ArgumentTypeError(f"Invalid setting '{value}', expected NAME=VALUE")
+    try:
+        return name, json.loads(raw)
+    except json.JSONDecodeError:
+        return name, raw
+
+
+def main(argv=None):
+    from headless import parse_tower
+    parser = argparse.ArgumentParser(description="Play many seeded games in parallel and summarize their balance.")
+    parser.add_argument('--runs', type=int, default=100, help="games per configuration")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first game; the others follow")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes, the number of CPUs by default")
+    parser.add_argument('--layout', help="JSON file with a list of towers ({'type', 'pos', 'upgrades'})")
+    parser.add_argument('--tower', type=parse_tower, action='append', default=[],
+                        help="tower to place, as TYPE:X,Y or TYPE:X,Y:UPGRADES; may be repeated")
+    parser.add_argument('--strategy', choices=sorted(STRATEGIES), help="build towers during the game instead")
+    parser.add_argument('--max-towers', type=int, default=8, help="towers built by the strategy")
+    parser.add_argument('--set', type=parse_assignment, action='append', default=[], dest='overrides',
+                        help="override a setting, e.g. kill_reward=15; may be repeated")
+    parser.add_argument('--sweep', type=parse_assignment,
+                        help="compare values of one setting, e.g. tower_cost=[80,100,120]")
+    parser.add_argument('--max-ticks', type=int, default=60 * 60 * 15, help="stop a game after this many ticks")
+    parser.add_argument('--output', help="JSON file the summaries are written to")
+    args = parser.parse_args(argv)
+
+    layout = []
+    if args.layout:
+        with open(args.layout) as file:
+            layout = json.load(file)
+    layout += args.tower
+    strategy = ('greedy', {'max_towers': args.max_towers}) if args.strategy else None
+    if not layout and not strategy:
+        parser.error("give a layout with --layout or --tower, or a build --strategy")
+
+    overrides = dict(args.overrides)
+    configurations = {'base': overrides}
+    if args.sweep:
+        name, values = args.sweep
+        configurations = {f"{name}={value}": {**overrides, name: value}
+                          for value in (values if isinstance(values, list) else [values])}
+
+    jobs, labels = [], []
+    for label, configuration in configurations.items():
+        for seed in range(args.seed, args.seed + args.runs):
+            jobs.append({'seed': seed, 'layout': layout, 'strategy': strategy,
+                         'overrides': configuration, 'max_ticks': args.max_ticks})
+            labels.append(label)
+
+    # Compile the maps once here, so the workers only read their caches.
+    from gamemap import GameMap
+    from settings import Settings
+    settings = Settings()
+    for configuration in configurations.values():
+        if 'map_file' in configuration:
+            GameMap.load(configuration['map_file'], settings.map_cache_dir).close()
+
+    start = time.perf_counter()
+    results = run_batch(jobs, args.workers)
+    elapsed = time.perf_counter() - start
+    summaries = {label: summarize([result for result, job_label in zip(results, labels) if job_label == label])
+                 for label in configurations}
+    print_summaries(summaries)
+    print(f"{len(jobs)} games in {elapsed:.1f}s on {args.workers or os.cpu_count()} workers "
+          f"({len(jobs) / elapsed:.1f} games/s).")
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(summaries, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+
+
+TOWER_TYPES = ('basic', 'sniper', 'freezer')
+
+
+class Scenario:
+    """
+    A fixed workload: towers of each type along one enemy path, with enemies spread over it.
+    Enemies get enough health to survive the whole run and no wave spawns,
+    and towers keep their real rates of fire, so after a warm-up of a few
+    cooldowns every tower is in its regular firing cycle and the measured
+    ticks see the bullet load of a real game.
+    """
+    def __init__(self, path, towers, enemies):
+        """
+        Initialize the scenario.
+        Args:
+            path (int): Index of the route in Settings.enemy_path.
+            towers (int): Number of towers of each type.
+            enemies (int): Number of enemies on the route.
+        """
+        self.path = path
+        self.towers = towers
+        self.enemies = enemies
+
+    @property
+    def name(self):
+        return f"path{self.path}-towers{self.towers}-enemies{self.enemies}"
+
+    def build(self, warmup, ticks):
+        """
+        Create a game set up for the scenario.
+        Args:
+            warmup (int): Minimum number of warm-up ticks. It is lengthened to settle_ticks.
+            ticks (int): Number of measured ticks, which must also run before an enemy can leak.
+        Returns:
+            tuple: The game, with its towers placed and enemies on the field, and the warm-up ticks.
+        """
+        from main import TowerDefenseGame
+        from enemy import Enemy
+        with contextlib.redirect_stdout(io.StringIO()):
+            game = TowerDefenseGame(seed=0)
+        game.settings.replay_file = None
+        game.settings.starting_money = 10 ** 9
+        level = game.level
+        level.spawned_enemies = len(level.wave)
+        path = game.settings.enemy_path[self.path]
+
+        compiled = level.paths.get(path)
+        spots = sorted(game.grid.available_spots, key=lambda spot: self._distance_to_path(spot, path))
+        with contextlib.redirect_stdout(io.StringIO()):
+            for spot, tower_type in zip(spots, itertools.islice(itertools.cycle(TOWER_TYPES), 3 * self.towers)):
+                level.attempt_place_tower(spot, tower_type)
+        warmup = max(warmup, self.settle_ticks(game))
+
+        template = level.waves.enemy_types['basic']
+        image_path = game.settings.enemy_sprites[template['sprite']]
+        room = max(compiled.length - template['speed'] * (warmup + ticks) - 10, 0)
+        for index in range(self.enemies):
+            enemy = Enemy(path, template['speed'], 10 ** 9, image_path, game, level.enemy_manager)
+            enemy.distance = room * index / max(self.enemies, 1)
+            enemy.position = enemy.previous_position = compiled.position_at(enemy.distance)
+            level.enemies.add(enemy)
+        return game, warmup
+
+    @staticmethod
+    def settle_ticks(game):
+        """
+        Return the number of ticks after which every tower has fired a few times,
+        so the number of bullets in flight is steady.
+        """
+        cooldown = max((tower.rate_of_fire for tower in game.level.towers), default=0)
+        return 3 * math.ceil(cooldown * game.settings.fps / 1000)
+
+    @staticmethod
+    def _distance_to_path(point, path):
+        """
+        Return the distance from a point to the closest segment of a path.
+        """
+        best = math.inf
+        for (x1, y1), (x2, y2) in zip(path, path[1:]):
+            dx, dy = x2 - x1, y2 - y1
+            t = max(0, min(1, ((point[0] - x1) * dx + (point[1] - y1) * dy) / (dx * dx + dy * dy)))
+            best = min(best, math.hypot(point[0] - x1 - t * dx, point[1] - y1 - t * dy))
+        return best
+
+
+def time_calls(function, count):
+    """
+    Call a function repeatedly and return the duration of every call in milliseconds.
+    """
+    durations = []
+    for _ in range(count):
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def run_scenario(scenario, warmup, ticks, frames):
+    """
+    Measure simulation ticks and draw calls of a scenario separately.
+    Args:
+        scenario (Scenario): The workload to measure.
+        warmup (int): Minimum number of ticks simulated before measuring. The warm-up is
+            lengthened to Scenario.settle_ticks, so the number of bullets in flight is steady.
+        ticks (int): Number of measured ticks.
+        frames (int): Number of measured frames.
+    Returns:
+        dict: Median and mean milliseconds per tick and per frame, the tower and enemy counts,
+            and the mean number of bullets in flight over the measured ticks.
+    """
+    game, warmup = scenario.build(warmup, ticks)
+    tick_times, bullets = [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(warmup):
+            game._update_game()
+        for _ in range(ticks):
+            tick_times += time_calls(game._update_game, 1)
+            bullets.append(len(game.level.bullets))
+        draw_times = time_calls(lambda: game._draw(0.5), frames)
+    return {
+        'tick_ms': statistics.median(tick_times),
+        'tick_mean_ms': statistics.fmean(tick_times),
+        'draw_ms': statistics.median(draw_times),
+        'draw_mean_ms': statistics.fmean(draw_times),
+        'warmup': warmup,
+        'towers': len(game.level.towers),
+        'enemies': len(game.level.enemies),
+        'bullets': statistics.fmean(bullets),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results with a baseline.
+    Args:
+        results (dict): Scenario results by name.
+        baseline (dict): Baseline scenario results by name.
+        tolerance (float): Allowed slowdown as a fraction, e.g. 0.2 for 20%.
+    Returns:
+        list: (scenario, metric, baseline ms, current ms) for every regression.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        for metric in ('tick_ms', 'draw_ms'):
+            if result[metric] > reference[metric] * (1 + tolerance):
+                regressions.append((name, metric, reference[metric], result[metric]))
+    return regressions
+
+
+def print_results(results, baseline):
+    """
+    Print the results of every scenario, with the change from the baseline if there is one.
+    """
+    print(f"{'Scenario':<30} {'Tick ms':>9} {'Draw ms':>9} {'Bullets':>7} {'Tick %':>7} {'Draw %':>7}")
+    for name, result in results.items():
+        reference = baseline.get(name)
+        changes = ''
+        if reference:
+            changes = ' '.join(f"{(result[metric] / reference[metric] - 1) * 100:>+7.1f}"
+                               for metric in ('tick_ms', 'draw_ms'))
+        print(f"{name:<30} {result['tick_ms']:>9.3f} {result['draw_ms']:>9.3f} {result['bullets']:>7.1f} {changes}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark simulation ticks and drawing of the Tower Defense Game.")
+    parser.add_argument('--paths', type=int, nargs='+', default=[0, 1, 2], help="routes of Settings.enemy_path to use")
+    parser.add_argument('--towers', type=int, nargs='+', default=[2, 6], help="numbers of towers of each type")
+    parser.add_argument('--enemies', type=int, nargs='+', default=[50, 500], help="numbers of enemies")
+    parser.add_argument('--warmup', type=int, default=60, help="ticks simulated before measuring")
+    parser.add_argument('--ticks', type=int, default=200, help="measured ticks per scenario")
+    parser.add_argument('--frames', type=int, default=60, help="measured frames per scenario")
+    parser.add_argument('--output', default='benchmark_results.json', help="file the results are written to")
+    parser.add_argument('--baseline', default='benchmark_baseline.json',
+                        help="results file to compare against; record one with --output")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed slowdown before failing, e.g. 0.2")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)['scenarios']
+
+    results = {}
+    for path, towers, enemies in itertools.product(args.paths, args.towers, args.enemies):
+        scenario = Scenario(path, towers, enemies)
+        results[scenario.name] = run_scenario(scenario, args.warmup, args.ticks, args.frames)
+    print_results(results, baseline)
+
+    with open(args.output, 'w') as file:
+        json.dump({'python': sys.version.split()[0], 'platform': platform.platform(),
+                   'scenarios': results}, file, indent=2)
+    print(f"Results written to {args.output}.")
+
+    if not baseline:
+        print(f"No baseline at {args.baseline}; record one with --output {args.baseline}.")
+    regressions = compare(results, baseline, args.tolerance)
+    for name, metric, reference, current in regressions:
+        print(f"REGRESSION {name} {metric}: {reference:.3f} ms -> {current:.3f} ms")
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,69 +1,281 @@
-import pygame
-from pygame.math import Vector2
+import heapq
+import math
+import numpy as np
+from enemy_manager import round_half_away
 
 
-class Bullet(pygame.sprite.Sprite):
+class BulletManager:
     """
-    Represents a bullet fired by a tower.
-    Bullets travel towards a target enemy, deal damage on impact, and are removed
-    if they reach the target or leave the screen boundaries.
+    Stores all bullets in flight in contiguous NumPy arrays.
+    Bullets travel towards the position their target had when they were fired,
+    deal damage to the enemies they touch, and are removed once they are close
+    to that position or leave the screen. All bullets are moved, tested against
+    the enemies and drawn in single vectorized passes.
+    In analytic mode, bullets are aimed where they meet their target instead:
+    the impact is computed when a bullet is fired from the enemy's path and
+    current speed, and the hit is scheduled for that tick. Damage is applied
+    from a queue ordered by impact tick, so bullets are never tested against
+    the enemies; they only move to be drawn.
     """
-    def __init__(self, start_pos, target_pos, damage, game, tower=None):
+    speed = 5
+    arrays = ('position', 'previous_position', 'velocity', 'target', 'damage', 'visible', 'impact')
+
+    def __init__(self, game, image, hidden_towers=(), capacity=64, analytic=False):
         """
-        Initialize a Bullet instance.
+        Initialize the bullet manager.
         Args:
-            start_pos (tuple): The starting position of the bullet (x, y).
-            target_pos (tuple): The position of the target enemy (x, y).
-            damage (int): The amount of damage the bullet deals on impact.
             game: Reference to the main game instance.
-            tower (Tower, optional): The tower that fired the bullet. Defaults to None.
+            image (pygame.Surface): Sprite drawn for every visible bullet.
+            hidden_towers (tuple, optional): Tower classes whose bullets are not drawn. Defaults to ().
+            capacity (int, optional): Number of bullets the arrays hold before growing. Defaults to 64.
+            analytic (bool, optional): Whether hits are scheduled at the computed impact tick
+                instead of tested by collision. Defaults to False.
         Attributes:
-            position (Vector2): Current position of the bullet.
-            target (Vector2): Position of the target enemy.
-            speed (float): Speed of the bullet.
-            damage (int): Damage dealt by the bullet.
-            velocity (Vector2): Direction and speed of the bullet's movement.
-            tower (Tower): Reference to the tower that fired the bullet.
-        """
-        super().__init__()
+            count (int): Number of bullets in flight; rows [0, count) of every array are in use.
+            peak (int): Highest number of bullets in flight so far.
+            position (ndarray): Current position of every bullet.
+            previous_position (ndarray): Position of every bullet at the previous tick.
+            velocity (ndarray): Movement of every bullet per tick.
+            target (ndarray): Position every bullet travels to.
+            damage (ndarray): Damage dealt by every bullet.
+            visible (ndarray): Whether every bullet is drawn.
+            impact (ndarray): Tick at which every bullet hits, in analytic mode.
+            towers (list): Tower that fired every bullet.
+            effects (list): Timed debuff applied on hit by every bullet, or None.
+            impacts (list): Heap of the scheduled hits as (tick, order, enemy, serial, damage,
+                tower, effect), in analytic mode.
+            max_flight (int): Ticks a bullet needs to cross the screen diagonally; targets not
+                reached within it are missed.
+        """
         self.game = game
-        self.image = pygame.image.load('assets/bullets/basic_bullet.png').convert_alpha()
-        self.rect = self.image.get_rect(center=start_pos)
-        self.position = Vector2(start_pos)
-        self.target = Vector2(target_pos)
-        self.speed = 5
-        self.damage = damage
-        self.velocity = self.calculate_velocity()
-        self.tower = tower
-
-    def calculate_velocity(self):
-        """
-        Calculate the velocity vector for the bullet.
-        Determines the direction and speed of the bullet based on its target.
+        self.image = image
+        self.hidden_towers = hidden_towers
+        self.size = np.array(image.get_size())
+        self.count = 0
+        self.peak = 0
+        self.capacity = 0
+        self.position = np.zeros((0, 2))
+        self.previous_position = np.zeros((0, 2))
+        self.velocity = np.zeros((0, 2))
+        self.target = np.zeros((0, 2))
+        self.damage = np.zeros(0)
+        self.visible = np.zeros(0, dtype=bool)
+        self.impact = np.zeros(0, dtype=np.int64)
+        self.towers = []
+        self.effects = []
+        self.analytic = analytic
+        self.impacts = []
+        self.fired = 0
+        settings = game.settings
+        self.max_flight = math.ceil(math.hypot(settings.screen_width, settings.screen_height) / self.speed)
+        self._grow(capacity)
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self, capacity):
+        for name in self.arrays:
+            array = getattr(self, name)
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:self.count] = array[:self.count]
+            setattr(self, name, grown)
+        self.capacity = capacity
+
+    def intercept(self, start_pos, enemy):
+        """
+        Find where a bullet fired now first reaches an enemy keeping its current speed.
+        The enemy is looked up at every future tick along its path until it would
+        leak; the first tick at which the bullet's reach covers its position is the impact.
+        Args:
+            start_pos (tuple): The starting position of the bullet (x, y).
+            enemy (Enemy): The target, still alive.
         Returns:
-            Vector2: The velocity vector for the bullet.
+            tuple: Ticks until the impact and the (x, y) impact point, or None if the
+                bullet cannot reach the enemy.
+        """
+        manager = enemy.manager
+        slot = enemy.slot
+        path_id, distance, speed = manager.path_id[slot], manager.distance[slot], manager.speed[slot]
+        horizon = self.max_flight
+        if speed > 0:
+            horizon = min(horizon, int((manager.paths.lengths[path_id] - distance) / speed) + 1)
+        if horizon < 1:
+            return None
+        steps = np.arange(1, horizon + 1)
+        # The bullet moves once in the tick it is fired, the enemy only from the next one.
+        points = manager.paths.positions(np.full(horizon, path_id), distance + speed * (steps - 1))
+        reached = np.hypot(*(points - start_pos).T) <= self.speed * steps
+        if not reached.any():
+            return None
+        index = int(reached.argmax())
+        return index + 1, points[index]
+
+    def fire(self, start_pos, target_pos, damage, tower=None, effect=None, enemy=None):
         """
-        direction = (self.target - self.position).normalize()
-        velocity = direction * self.speed
-        return velocity
+        Add a bullet.
+        Args:
+            start_pos (tuple): The starting position of the bullet (x, y).
+            target_pos (tuple): The position of the target enemy (x, y).
+            damage (float): The amount of damage the bullet deals on impact.
+            tower (Tower, optional): The tower that fired the bullet. Defaults to None.
+            effect (dict, optional): Timed debuff applied to the enemy on hit. Defaults to None.
+            enemy (Enemy, optional): The target, needed in analytic mode. Defaults to None.
+        """
+        if self.count == self.capacity:
+            self._grow(self.capacity * 2)
+        slot = self.count
+        self.count += 1
+        self.peak = max(self.peak, self.count)
+        direction = np.subtract(target_pos, start_pos, dtype=float)
+        length = np.hypot(*direction)
+        self.position[slot] = self.previous_position[slot] = start_pos
+        self.velocity[slot] = direction / length * self.speed if length else 0
+        self.target[slot] = target_pos
+        self.damage[slot] = damage
+        self.visible[slot] = not isinstance(tower, self.hidden_towers)
+        self.towers.append(tower)
+        self.effects.append(effect)
+        if self.analytic:
+            self._schedule(slot, start_pos, target_pos, damage, tower, effect, enemy)
+
+    def _schedule(self, slot, start_pos, target_pos, damage, tower, effect, enemy):
+        """
+        Aim a new bullet at its impact point and queue its hit.
+        A bullet that cannot reach its target flies to the target's position and misses.
+        """
+        tick = self.game.sim_clock.ticks
+        hit = self.intercept(start_pos, enemy) if enemy is not None and enemy.slot is not None else None
+        if hit:
+            ticks, point = hit
+        else:
+            distance = math.hypot(target_pos[0] - start_pos[0], target_pos[1] - start_pos[1])
+            ticks, point, enemy = max(1, math.ceil(distance / self.speed)), target_pos, None
+        self.velocity[slot] = (np.asarray(point, dtype=float) - start_pos) / ticks
+        self.target[slot] = point
+        self.impact[slot] = tick + ticks
+        self.fired += 1
+        serial = enemy.serial if enemy is not None else None
+        heapq.heappush(self.impacts, (tick + ticks, self.fired, enemy, serial, damage, tower, effect))
+
+    def resolve(self):
+        """
+        Apply the hits scheduled up to the current tick and remove their bullets.
+        Hits are applied in impact order, and in firing order within a tick. Hits on
+        enemies that died or leaked in the meantime are dropped.
+        """
+        tick = self.game.sim_clock.ticks
+        if not self.impacts or self.impacts[0][0] > tick:
+            return
+        while self.impacts and self.impacts[0][0] <= tick:
+            _, _, enemy, serial, damage, tower, effect = heapq.heappop(self.impacts)
+            if enemy is None or enemy.slot is None or enemy.serial != serial:
+                continue
+            if effect:
+                enemy.apply_effect(effect)
+            enemy.take_damage(damage, tower)
+        self._keep(self.impact[:self.count] > tick)
+
+    def _keep(self, keep):
+        """
+        Compact the arrays to the bullets selected by a boolean mask, preserving their order.
+        """
+        n = self.count
+        kept = int(keep.sum())
+        if kept == n:
+            return
+        for name in self.arrays:
+            array = getattr(self, name)
+            array[:kept] = array[:n][keep]
+        self.towers = [tower for tower, flag in zip(self.towers, keep.tolist()) if flag]
+        self.effects = [effect for effect, flag in zip(self.effects, keep.tolist()) if flag]
+        self.count = kept
+
+    def _rects(self):
+        """
+        Return the (left, top) corners of the bullet rects, centered like pygame.Rect.
+        """
+        return round_half_away(self.position[:self.count]) - self.size // 2
+
+    def collide(self, enemies):
+        """
+        Apply the bullets touching an enemy and remove them.
+        Rects are tested in one pass: enemies are sorted by their left edge, and
+        each bullet is only compared with the enemies whose left edge lies within
+        one enemy width of it. Hits are applied in firing order, and for each
+        bullet in the order the enemies spawned.
+        Args:
+            enemies (EnemyManager): The enemies to test against.
+        """
+        n, m = self.count, enemies.count
+        if not n or not m:
+            return
+        bullet_min = self._rects()
+        bullet_max = bullet_min + self.size
+        enemy_min, enemy_max = enemies.rects()
+
+        order = np.argsort(enemy_min[:, 0], kind='stable')
+        sorted_left = enemy_min[order, 0]
+        widest = int((enemy_max[:, 0] - enemy_min[:, 0]).max())
+        low = np.searchsorted(sorted_left, bullet_min[:, 0] - widest, side='right')
+        high = np.searchsorted(sorted_left, bullet_max[:, 0], side='left')
+        counts = np.maximum(high - low, 0)
+        total = int(counts.sum())
+        if not total:
+            return
+        bullet_index = np.repeat(np.arange(n), counts)
+        first = np.repeat(low - (np.cumsum(counts) - counts), counts)
+        enemy_index = order[first + np.arange(total)]
+
+        hit = ((bullet_min[bullet_index, 0] < enemy_max[enemy_index, 0]) &
+               (enemy_min[enemy_index, 0] < bullet_max[bullet_index, 0]) &
+               (bullet_min[bullet_index, 1] < enemy_max[enemy_index, 1]) &
+               (enemy_min[enemy_index, 1] < bullet_max[bullet_index, 1]))
+        bullet_index, enemy_index = bullet_index[hit], enemy_index[hit]
+        if not len(bullet_index):
+            return
+        hits = np.lexsort((enemies.serial[enemy_index], bullet_index))
+        bullet_index, enemy_index = bullet_index[hits], enemy_index[hits]
+
+        targets = [enemies.views[slot] for slot in enemy_index.tolist()]
+        for bullet, enemy in zip(bullet_index.tolist(), targets):
+            if self.effects[bullet]:
+                enemy.apply_effect(self.effects[bullet])
+            enemy.take_damage(self.damage[bullet].item(), self.towers[bullet])
+        keep = np.ones(n, dtype=bool)
+        keep[bullet_index] = False
+        self._keep(keep)
 
     def update(self):
         """
-        Update the bullet's position and check for collisions or out-of-bounds conditions.
-        Moves the bullet along its velocity vector. Removes the bullet if it is
-        close to its target or exits the screen boundaries.
+        Move every bullet and remove those close to their target or outside the screen.
+        In analytic mode bullets are only removed by resolve, at their impact.
         """
-        self.position += self.velocity
-        self.rect.center = self.position
-        if self.position.distance_to(self.target) < 10 or not self.game.is_position_inside(self.position):
-            self.kill()
+        n = self.count
+        if not n:
+            return
+        position = self.position[:n]
+        self.previous_position[:n] = position
+        position += self.velocity[:n]
+        if self.analytic:
+            return
+        arrived = np.hypot(*(self.target[:n] - position).T) < 10
+        settings = self.game.settings
+        outside = ((position[:, 0] < 0) | (position[:, 0] > settings.screen_width) |
+                   (position[:, 1] < 0) | (position[:, 1] > settings.screen_height))
+        self._keep(~(arrived | outside))
 
-    def is_position_inside(self, pos):
+    def draw(self, screen, alpha=1.0):
         """
-        Check if a given position is inside the screen boundaries.
+        Draw the visible bullets at their positions interpolated between the last two ticks.
         Args:
-            pos (Vector2): The position to check.
+            screen: The game screen to draw on.
+            alpha (float, optional): Fraction of a tick elapsed since the last update. Defaults to 1.0.
         Returns:
-            bool: True if the position is inside the screen, False otherwise.
+            list: Screen regions drawn on.
         """
-        return 0 <= pos.x <= self.game.settings.screen_width and 0 <= pos.y <= self.game.settings.screen_height
+        n = self.count
+        if not n:
+            return []
+        offset = np.trunc((self.position[:n] - self.previous_position[:n]) * (alpha - 1)).astype(np.int64)
+        corners = (self._rects() + offset)[self.visible[:n]]
+        return screen.blits([(self.image, corner) for corner in corners.tolist()])
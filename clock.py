@@ -0,0 +1,31 @@
+class SimulatedClock:
+    """
+    Fixed-step game time that only advances when the simulation ticks.
+    All game timers are derived from the integer tick count, so the same inputs
+    give the same results whatever the real frame rate, and a simulation can
+    run as fast as the CPU allows.
+    """
+    def __init__(self, fps):
+        """
+        Initialize the simulated clock.
+        Args:
+            fps (int): Number of simulation ticks per second.
+        Attributes:
+            ticks (int): Number of ticks simulated so far.
+        """
+        self.fps = fps
+        self.ticks = 0
+
+    def advance(self):
+        """
+        Move the clock forward by one tick.
+        """
+        self.ticks += 1
+
+    def get_ticks(self):
+        """
+        Return the current game time.
+        Returns:
+            int: Simulated milliseconds since the start of the game.
+        """
+        return self.ticks * 1000 // self.fps
@@ -1,5 +1,6 @@
 import pygame
-from pygame.math import Vector2
+from aura import StatusEffects, stack_effects
+from enemy_manager import ManagedAttribute, ManagedVector
 
 
 class Enemy(pygame.sprite.Sprite):
@@ -8,87 +9,246 @@ class Enemy(pygame.sprite.Sprite):
 	Enemies follow a predefined path, take damage from towers, and have a health
 	indicator. They can be slowed by Freezing Towers and contribute money to the
 	player when defeated.
+	The enemy's state lives in a row of the level's EnemyManager arrays, which
+	moves all enemies at once; this sprite is a view of that row.
+	Views handed out by an EnemyPool go back to it when the enemy dies and are
+	reset in place for a later spawn.
 	"""
-	def __init__(self, path, speed=2, health=10, image_path=None, game=None):
+	serial = ManagedAttribute()
+	distance = ManagedAttribute()
+	speed = ManagedAttribute()
+	default_speed = ManagedAttribute()
+	health = ManagedAttribute()
+	max_health = ManagedAttribute()
+	position = ManagedVector()
+	previous_position = ManagedVector()
+
+	def __init__(self, path, speed=2, health=10, image_path=None, game=None, manager=None):
 		"""
 		Initialize an Enemy instance.
 		Args:
-			path (list): List of points representing the enemy's path.
+			path (list): List of points representing the enemy's path, or None to create
+				the enemy without adding it to the manager, as a spare view for a pool.
 			speed (float, optional): The speed of the enemy. Defaults to 2.
 			health (int, optional): The initial health of the enemy. Defaults to 10.
 			image_path (str, optional): Path to the image file for the enemy. Defaults to None.
 			game: Reference to the main game instance.
+			manager (EnemyManager, optional): Manager storing the enemy's state. Defaults to
+				the manager of the game's level.
 		"""
 		super().__init__()
-		self.image = pygame.Surface((30, 40))
-		self.image = pygame.image.load(image_path).convert_alpha()
-		self.rect = self.image.get_rect()
 		self.game = game
+		self.slot = None
+		self.detached = None
+		self.pool = None
+		self.manager = manager or game.level.enemy_manager
+		if path is not None:
+			self.reset(path, speed, health, image_path)
+
+	def reset(self, path, speed, health, image_path):
+		"""
+		Give the enemy a new path, speed, health and sprite and add it to its manager.
+		Args:
+			path (list): List of points representing the enemy's path.
+			speed (float): The speed of the enemy.
+			health (int): The initial health of the enemy.
+			image_path (str): Path to the image file for the enemy.
+		"""
+		self.image = self.game.assets.image(image_path)
 		self.path = path
-		self.path_index = 0
-		self.speed = speed
-		self.default_speed = speed
-		self.health = health
-		self.max_health = health
-		self.position = Vector2(path[0])
-		self.rect.center = self.position
-		self.health_indicator = pygame.Rect(self.position[0], self.position[1], 30, 5)
+		self.status_effects = StatusEffects()
+		self.detached = None
+		self.compiled_path = self.manager.paths.get(path)
+		self.manager.add(self, path, speed, health)
+
+	@property
+	def progress(self):
+		"""
+		float: Fraction of the path covered so far, from 0 at the start to 1 at the exit.
+		"""
+		return self.distance / self.compiled_path.length
+
+	@property
+	def remaining_distance(self):
+		"""
+		float: Distance left until the enemy reaches the end of its path.
+		"""
+		return self.compiled_path.length - self.distance
+
+	@property
+	def rect(self):
+		"""
+		pygame.Rect: The sprite's rect, centered on the enemy's position.
+		"""
+		rect = self.image.get_rect()
+		rect.center = self.position
+		return rect
 
-	def take_damage(self, amount):
+	@property
+	def health_indicator(self):
+		"""
+		pygame.Rect: The health bar above the enemy, as wide as its remaining health.
+		"""
+		x, y = self.position
+		indicator = pygame.Rect(0, 0, int(30 * (self.health / self.max_health)), 5)
+		indicator.x = x - 15
+		indicator.y = y - 20
+		return indicator
+
+	def kill(self):
+		"""
+		Remove the enemy from all groups, release its row of the manager arrays,
+		and return it to its pool if it came from one.
+		"""
+		super().kill()
+		if self.slot is None:
+			return
+		self.manager.remove(self)
+		if self.pool:
+			self.pool.release(self)
+
+	def apply_effect(self, effect):
+		"""
+		Apply a timed debuff to the enemy.
+		Args:
+			effect (dict): The debuff, with its 'effect' name, 'amount' and 'duration' in milliseconds.
+		"""
+		expires_at = self.game.sim_clock.get_ticks() + effect['duration']
+		self.status_effects.apply(effect['effect'], effect['amount'], expires_at)
+		if self.slot is not None:
+			self.manager.debuffed.add(self)
+
+	def current_effects(self):
+		"""
+		Return the combined aura and debuff effects acting on the enemy.
+		Returns:
+			dict: Combined amount for each active effect name.
+		"""
+		auras = self.game.level.auras
+		if not self.status_effects.active:
+			return auras.effects_at(self.path, self.distance)
+		debuffs = self.status_effects.current(self.game.sim_clock.get_ticks())
+		effects = auras.raw_effects_at(self.path, self.distance) + debuffs
+		return stack_effects(effects, self.game.settings.aura_stacking)
+
+	def take_damage(self, amount, source=None):
 		"""
 		Reduce the enemy's health by the given amount.
 		If the enemy's health drops to 0 or below, it is removed from the game,
 		and the player gains money.
 		Args:
 			amount (int): The amount of damage to apply.
+			source (Tower, optional): The tower dealing the damage, credited with the health
+				actually taken. Defaults to None.
 		"""
+		if source is not None:
+			source.damage_dealt += min(amount, max(self.health, 0))
 		self.health -= amount
-		self.health_indicator.width = int(30 * (self.health / self.max_health))
 		if self.health <= 0:
 			self.kill()
-			self.game.settings.starting_money += 20
-
-	def update(self):
-		"""
-		Update the enemy's position and state.
-		The enemy moves along its path, and its speed is adjusted if it is within
-		the range of a Freezing Tower. If the enemy reaches the end of the path,
-		it triggers the game-over condition.
-		"""
-		freezing_range = False
-		for tower in self.game.level.towers:
-			if tower.__class__.__name__ == "FreezingTower":
-				distance_to_tower = self.position.distance_to(Vector2(tower.rect.center))
-				if distance_to_tower <= tower.tower_range:
-					freezing_range = True
-					break
-		if freezing_range:
-			self.speed = self.default_speed - 0.2
-		else:
-			self.speed = self.default_speed
+			self.game.settings.starting_money += self.game.settings.kill_reward
+			self.game.level.kills += 1
+
+	def draw_offset(self, alpha):
+		"""
+		Return the offset from the enemy's current position to where it is drawn.
+		Args:
+			alpha (float): Fraction of a tick elapsed since the last update.
+		Returns:
+			Vector2: Offset of the interpolated position between the last two ticks.
+		"""
+		return (self.position - self.previous_position) * (alpha - 1)
+
+	def draw(self, screen, alpha=1.0):
+		"""
+		Draw the enemy's sprite at its interpolated position.
+		Args:
+			screen: The game screen to draw on.
+			alpha (float, optional): Fraction of a tick elapsed since the last update. Defaults to 1.0.
+		"""
+		screen.blit(self.image, self.rect.move(self.draw_offset(alpha)))
 
-		if self.path_index < len(self.path) - 1:
-			start_point = Vector2(self.path[self.path_index])
-			end_point = Vector2(self.path[self.path_index + 1])
-			direction = (end_point - start_point).normalize()
+	def draw_health_indicator(self, screen, alpha=1.0):
+		"""
+		Draw the enemy's health indicator on the screen.
+		Args:
+			screen: The game screen to draw on.
+			alpha (float, optional): Fraction of a tick elapsed since the last update. Defaults to 1.0.
+		"""
+		pygame.draw.rect(screen, (0, 255, 0), self.health_indicator.move(self.draw_offset(alpha)))
 
-			self.position += direction * self.speed
-			self.rect.center = self.position
 
-			if self.position.distance_to(end_point) < self.speed:
-				self.path_index += 1
+class EnemyPool:
+	"""
+	Reuses dead enemy sprites for new spawns.
+	Spawning takes a spare view and resets it in place instead of building a
+	new sprite, and a killed enemy goes back to the spare list, so a long game
+	stops allocating enemies once the largest wave has been seen.
+	"""
+	def __init__(self, game, manager):
+		"""
+		Initialize the pool.
+		Args:
+			game: Reference to the main game instance.
+			manager (EnemyManager): Manager storing the state of the pooled enemies.
+		Attributes:
+			free (list): Spare enemy views, ready to be reset.
+			created (int): Number of enemy views built so far.
+			reused (int): Number of spawns served by a spare view.
+		"""
+		self.game = game
+		self.manager = manager
+		self.free = []
+		self.created = 0
+		self.reused = 0
 
-			if self.path_index >= len(self.path) - 1:
-				self.game.game_over()
-				self.kill()
+	def _new(self):
+		enemy = Enemy(None, game=self.game, manager=self.manager)
+		enemy.pool = self
+		self.created += 1
+		return enemy
 
-		self.health_indicator.x = self.position[0] - 15
-		self.health_indicator.y = self.position[1] - 20
+	def reserve(self, count):
+		"""
+		Make sure `count` more enemies can spawn without allocating views or growing arrays.
+		Args:
+			count (int): Number of enemies about to spawn, e.g. the size of the next wave.
+		"""
+		self.manager.reserve(count)
+		while len(self.free) < count:
+			self.free.append(self._new())
 
-	def draw_health_indicator(self, screen):
+	def acquire(self, path, speed, health, image_path):
 		"""
-		Draw the enemy's health indicator on the screen.
+		Spawn an enemy, reusing a spare view if there is one.
 		Args:
-			screen: The game screen to draw on.
+			path (list): List of points representing the enemy's path.
+			speed (float): The speed of the enemy.
+			health (int): The initial health of the enemy.
+			image_path (str): Path to the image file for the enemy.
+		Returns:
+			Enemy: The enemy, added to the manager.
+		"""
+		if self.free:
+			enemy = self.free.pop()
+			self.reused += 1
+		else:
+			enemy = self._new()
+		enemy.reset(path, speed, health, image_path)
+		return enemy
+
+	def release(self, enemy):
+		"""
+		Take back a killed enemy.
+		"""
+		self.free.append(enemy)
+
+	def stats(self):
+		"""
+		Return the usage of the pool.
+		Returns:
+			dict: Views created, spawns served by reuse, spare views, and the high-water
+				mark of live enemies and the row capacity of the manager.
 		"""
-		pygame.draw.rect(screen, (0, 255, 0), self.health_indicator)
+		return {'created': self.created, 'reused': self.reused, 'free': len(self.free),
+				'peak': self.manager.peak, 'capacity': self.manager.capacity}
@@ -0,0 +1,277 @@
+import numpy as np
+from pygame.math import Vector2
+
+
+def round_half_away(values):
+    """
+    Round to the nearest integers, halves away from zero, like pygame.Rect does for float coordinates.
+    """
+    return np.where(values >= 0, np.floor(values + 0.5), np.ceil(values - 0.5)).astype(np.int64)
+
+
+class ManagedAttribute:
+    """
+    Enemy attribute stored in a column of the EnemyManager arrays.
+    Once an enemy is removed from the manager, the attribute reads and writes
+    the snapshot taken at removal instead.
+    """
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, enemy, owner=None):
+        if enemy is None:
+            return self
+        if enemy.slot is None:
+            return enemy.detached[self.name]
+        return getattr(enemy.manager, self.name)[enemy.slot].item()
+
+    def __set__(self, enemy, value):
+        if enemy.slot is None:
+            enemy.detached[self.name] = value
+        else:
+            getattr(enemy.manager, self.name)[enemy.slot] = value
+            enemy.manager.version += 1
+
+
+class ManagedVector:
+    """
+    Enemy position stored in a row of an EnemyManager (n, 2) array, returned as a Vector2 copy.
+    """
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, enemy, owner=None):
+        if enemy is None:
+            return self
+        if enemy.slot is None:
+            return Vector2(enemy.detached[self.name])
+        x, y = getattr(enemy.manager, self.name)[enemy.slot]
+        return Vector2(float(x), float(y))
+
+    def __set__(self, enemy, value):
+        if enemy.slot is None:
+            enemy.detached[self.name] = tuple(value)
+        else:
+            getattr(enemy.manager, self.name)[enemy.slot] = tuple(value)
+            enemy.manager.version += 1
+
+
+class EnemyManager:
+    """
+    Stores the state of all live enemies in contiguous NumPy arrays.
+    Each enemy's progress is its distance along its compiled path. Movement,
+    slowing auras and positions are computed for every enemy at once with
+    vectorized operations. Enemy sprites are thin views that read and
+    write their row of the arrays, so the Level.enemies group, targeting and
+    health-bar drawing keep working unchanged. Rows are compacted on death by
+    moving the last enemy into the freed slot.
+    """
+    columns = ('serial', 'path_id', 'distance', 'speed', 'default_speed', 'health', 'max_health')
+    vectors = ('position', 'previous_position')
+
+    def __init__(self, level, capacity=64):
+        """
+        Initialize the enemy manager.
+        Args:
+            level: Reference to the level owning the enemies.
+            capacity (int, optional): Number of enemies the arrays hold before growing. Defaults to 64.
+        Attributes:
+            count (int): Number of live enemies; rows [0, count) of every array are in use.
+            spawned (int): Number of enemies added so far; each enemy's serial is its spawn number.
+            views (list): Enemy sprite of each used row.
+            debuffed (set): Enemies carrying timed debuffs, whose effects are stacked in Python.
+            paths (PathTable): Compiled paths of the level.
+            version (int): Incremented whenever enemies are added, removed, moved or changed,
+                so derived indexes know when to rebuild.
+            peak (int): Highest number of live enemies so far.
+        """
+        self.level = level
+        self.game = level.game
+        self.count = 0
+        self.spawned = 0
+        self.views = []
+        self.debuffed = set()
+        self.version = 0
+        self.peak = 0
+
+        self.paths = level.paths
+        self.aura_tables = {}
+
+        self.capacity = 0
+        self.position = np.zeros((0, 2))
+        self.previous_position = np.zeros((0, 2))
+        self.serial = np.zeros(0, dtype=np.int64)
+        self.path_id = np.zeros(0, dtype=np.int64)
+        self.distance = np.zeros(0)
+        self.speed = np.zeros(0)
+        self.default_speed = np.zeros(0)
+        self.health = np.zeros(0)
+        self.max_health = np.zeros(0)
+        self.size = np.zeros((0, 2), dtype=np.int64)
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        for name in self.columns + self.vectors + ('size',):
+            array = getattr(self, name)
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:self.count] = array[:self.count]
+            setattr(self, name, grown)
+        self.capacity = capacity
+
+    def reserve(self, count):
+        """
+        Grow the arrays, if needed, so that `count` more enemies fit without growing again.
+        """
+        if self.count + count > self.capacity:
+            self._grow(max(self.count + count, self.capacity * 2))
+
+    def add(self, enemy, path, speed, health):
+        """
+        Store a new enemy in the next free row.
+        Args:
+            enemy (Enemy): The sprite viewing the row.
+            path (list): The path the enemy follows.
+            speed (float): Speed of the enemy in pixels per tick.
+            health (int): Initial health of the enemy.
+        """
+        if self.count == self.capacity:
+            self._grow(self.capacity * 2)
+        slot = self.count
+        self.count += 1
+        self.peak = max(self.peak, self.count)
+        self.version += 1
+        self.views.append(enemy)
+        enemy.slot = slot
+        self.serial[slot] = self.spawned
+        self.spawned += 1
+        self.path_id[slot] = self.paths.register(path)
+        self.distance[slot] = 0
+        self.speed[slot] = self.default_speed[slot] = speed
+        self.health[slot] = self.max_health[slot] = health
+        self.position[slot] = self.previous_position[slot] = path[0]
+        self.size[slot] = enemy.image.get_size()
+
+    def remove(self, enemy):
+        """
+        Release the row of an enemy and move the last enemy into it.
+        The removed enemy keeps a snapshot of its state in enemy.detached.
+        Args:
+            enemy (Enemy): The enemy to remove.
+        """
+        slot = enemy.slot
+        if slot is None:
+            return
+        enemy.detached = {name: getattr(self, name)[slot].item() for name in self.columns}
+        enemy.detached.update({name: tuple(getattr(self, name)[slot]) for name in self.vectors})
+        enemy.slot = None
+        self.debuffed.discard(enemy)
+        self.version += 1
+        last = self.count - 1
+        if slot != last:
+            for name in self.columns + self.vectors + ('size',):
+                array = getattr(self, name)
+                array[slot] = array[last]
+            moved = self.views[last]
+            moved.slot = slot
+            self.views[slot] = moved
+        self.views.pop()
+        self.count = last
+
+    def rects(self, first=0, last=None):
+        """
+        Return the rects of the enemies in rows [first, last), as Enemy.rect computes them.
+        Args:
+            first (int, optional): First row. Defaults to 0.
+            last (int, optional): Row after the last one. Defaults to the number of live enemies.
+        Returns:
+            tuple: (left, top) corners and exclusive (right, bottom) corners, as integer arrays.
+        """
+        last = self.count if last is None else last
+        top_left = round_half_away(self.position[first:last]) - self.size[first:last] // 2
+        return top_left, top_left + self.size[first:last]
+
+    def _aura_table(self, name):
+        """
+        Return the flattened intervals of one aura effect, rebuilt when the aura field changes.
+        """
+        auras = self.level.auras
+        table = self.aura_tables.get(name)
+        if table is None or table[:2] != (auras.version, len(self.paths.paths)):
+            table = (auras.version, len(self.paths.paths), *auras.effect_table(name))
+            self.aura_tables[name] = table
+        return table[2:]
+
+    def _slow(self, path_id, distance):
+        """
+        Return the slow applied to every enemy by the tower auras.
+        Args:
+            path_id (ndarray): Path id of every enemy.
+            distance (ndarray): Distance of every enemy along its path.
+        Returns:
+            ndarray: Slow amount of every enemy.
+        """
+        starts, ends, amounts = self._aura_table('slow')
+        if not len(starts):
+            return np.zeros(len(distance))
+        keys = self.paths.base[path_id] + distance
+        index = np.searchsorted(starts, keys, side='right') - 1
+        inside = (index >= 0) & (keys <= ends[np.maximum(index, 0)])
+        return np.where(inside, amounts[np.maximum(index, 0)], 0.0)
+
+    def update(self):
+        """
+        Advance every enemy along its path by one tick.
+        Enemies are slowed by the tower auras and their debuffs, their distance
+        along the path grows by their speed, and their position is looked up from
+        the compiled path. Enemies reaching the end of their path leak and end the game.
+        """
+        n = self.count
+        if not n:
+            return
+        position = self.position[:n]
+        self.previous_position[:n] = position
+        path_id = self.path_id[:n]
+        distance = self.distance[:n]
+
+        slow = self._slow(path_id, distance)
+        for enemy in list(self.debuffed):
+            if enemy.status_effects.active:
+                slow[enemy.slot] = enemy.current_effects().get('slow', 0)
+            else:
+                self.debuffed.discard(enemy)
+        speed = np.maximum(self.default_speed[:n] - slow, 0)
+        self.speed[:n] = speed
+
+        distance += speed
+        position[:] = self.paths.positions(path_id, distance)
+        self.version += 1
+
+        leaked = [self.views[slot] for slot in np.flatnonzero(distance >= self.paths.lengths[path_id])]
+        for enemy in leaked:
+            self.level.leaks += 1
+            self.game.game_over()
+            enemy.kill()
+
+    def draw(self, screen, alpha=1.0):
+        """
+        Draw every enemy and its health bar at the position interpolated between the last two ticks.
+        Produces the same pixels as Enemy.draw and Enemy.draw_health_indicator, with one blits call.
+        Args:
+            screen: The game screen to draw on.
+            alpha (float, optional): Fraction of a tick elapsed since the last update. Defaults to 1.0.
+        Returns:
+            list: Screen regions drawn on.
+        """
+        n = self.count
+        if not n:
+            return []
+        position = self.position[:n]
+        offset = np.trunc((position - self.previous_position[:n]) * (alpha - 1)).astype(np.int64)
+        top_left = round_half_away(position) - self.size[:n] // 2 + offset
+        rects = screen.blits([(enemy.image, corner) for enemy, corner in zip(self.views, top_left.tolist())])
+        bars = round_half_away(position - (15, 20)) + offset
+        widths = (30 * (self.health[:n] / self.max_health[:n])).astype(np.int64)
+        for (x, y), width in zip(bars.tolist(), widths.tolist()):
+            if width > 0:
+                rects.append(screen.fill((0, 255, 0), (x, y, width, 5)))
+        return rects
@@ -0,0 +1,296 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import numpy as np
+from paths import CompiledPath
+
+
+MAGIC = b'TDMAP'
+FORMAT_VERSION = 1
+ALIGNMENT = 16
+
+
+def read_source(path):
+    """
+    Read a map source file.
+    A map is a JSON object with:
+        'screen': [width, height] of the game screen in pixels.
+        'grid': {'cols', 'rows', 'cell_size': [width, height]}.
+        'background': File path of the background image.
+        'paths': Enemy paths, each a list of [x, y] points.
+        'buildable': One string per grid row, with 'x' for every cell a tower may be placed on.
+        'coverage_ranges' (optional): Tower ranges the per-cell path coverage is computed for.
+    Args:
+        path (str): File path of the map.
+    Returns:
+        tuple: The parsed map and the SHA-1 digest of the file contents.
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    return json.loads(data), hashlib.sha1(data).hexdigest()
+
+
+def cell_centers(cols, rows, cell_size):
+    """
+    Return the center of every grid cell as a (cols, rows, 2) array.
+    """
+    col, row = np.meshgrid(np.arange(cols), np.arange(rows), indexing='ij')
+    return np.stack([col * cell_size[0] + cell_size[0] // 2, row * cell_size[1] + cell_size[1] // 2], axis=-1)
+
+
+def path_coverage(points, centers, ranges):
+    """
+    Measure the part of a path within reach of a tower on each cell.
+    Args:
+        points (ndarray): The (x, y) points of the path.
+        centers (ndarray): (n, 2) tower positions.
+        ranges (list): Tower ranges.
+    Returns:
+        tuple: Covered path length as an (n, len(ranges)) array, and the distance along the
+            path where the coverage starts and ends as an (n, len(ranges), 2) array;
+            NaN where the path is out of reach.
+    """
+    compiled = CompiledPath(points)
+    radii = np.asarray(ranges, dtype=float)[None, :]
+    length = np.zeros((len(centers), len(ranges)))
+    entry = np.full(length.shape, np.inf)
+    leave = np.full(length.shape, -np.inf)
+    for start, direction, segment_length, offset in zip(compiled.points, compiled.directions,
+                                                        compiled.lengths, compiled.cumulative):
+        relative = centers - start
+        projection = (relative @ direction)[:, None]
+        offset_squared = (relative * relative).sum(axis=1)[:, None] - projection * projection
+        half = np.sqrt(np.maximum(radii * radii - offset_squared, 0))
+        low = np.maximum(projection - half, 0)
+        high = np.minimum(projection + half, segment_length)
+        hit = (offset_squared <= radii * radii) & (low <= high)
+        length += np.where(hit, high - low, 0)
+        entry = np.minimum(entry, np.where(hit, offset + low, np.inf))
+        leave = np.maximum(leave, np.where(hit, offset + high, -np.inf))
+    span = np.stack([entry, leave], axis=-1)
+    span[length == 0] = np.nan
+    return length, span
+
+
+def compile_map(source_path, cache_path):
+    """
+    Compile a map source into its binary cache.
+    The cache holds a JSON header followed by the raw arrays: the points and
+    segment tables of every path, the buildable cells as a bitmap, and for
+    every buildable cell, range and path the covered path length and its span.
+    Args:
+        source_path (str): File path of the map source.
+        cache_path (str): File path the compiled map is written to.
+    """
+    source, digest = read_source(source_path)
+    cols, rows = source['grid']['cols'], source['grid']['rows']
+    cell_size = source['grid']['cell_size']
+    ranges = source.get('coverage_ranges', [50, 150, 300])
+    buildable = np.array([[row[col] == 'x' for row in source['buildable']] for col in range(cols)], dtype=bool)
+    if buildable.shape != (cols, rows):
+        raise ValueError(f"{source_path}: 'buildable' must have {rows} rows of {cols} cells")
+
+    arrays = {'buildable': np.packbits(buildable.ravel())}
+    centers = cell_centers(cols, rows, cell_size)[buildable].astype(float)
+    coverage_length = np.zeros((cols, rows, len(ranges), len(source['paths'])), dtype=np.float32)
+    coverage_span = np.full((cols, rows, len(ranges), len(source['paths']), 2), np.nan, dtype=np.float32)
+    for index, points in enumerate(source['paths']):
+        compiled = CompiledPath(points)
+        arrays[f'path{index}_points'] = compiled.points
+        arrays[f'path{index}_lengths'] = compiled.lengths
+        arrays[f'path{index}_directions'] = compiled.directions
+        arrays[f'path{index}_cumulative'] = compiled.cumulative
+        coverage_length[buildable, :, index], coverage_span[buildable, :, index] = path_coverage(
+            points, centers, ranges)
+    arrays['coverage_length'] = coverage_length
+    arrays['coverage_span'] = coverage_span
+
+    header = {
+        'source': digest,
+        'screen': source['screen'],
+        'grid': {'cols': cols, 'rows': rows, 'cell_size': cell_size},
+        'background': source['background'],
+        'paths': len(source['paths']),
+        'coverage_ranges': ranges,
+        'arrays': {},
+    }
+    offset = 0
+    for name, array in arrays.items():
+        header['arrays'][name] = {'dtype': array.dtype.str, 'shape': array.shape, 'offset': offset}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    encoded = json.dumps(header).encode()
+    prefix = MAGIC + struct.pack('<II', FORMAT_VERSION, len(encoded))
+    data_start = -(-(len(prefix) + len(encoded)) // ALIGNMENT) * ALIGNMENT
+
+    directory = os.path.dirname(cache_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Every compile writes its own file, so processes compiling the same map at once
+    # never see each other's partial writes; the last complete file wins.
+    handle, temporary = tempfile.mkstemp(dir=directory or '.', suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as file:
+            file.write(prefix + encoded)
+            for name, array in arrays.items():
+                file.seek(data_start + header['arrays'][name]['offset'])
+                file.write(np.ascontiguousarray(array).tobytes())
+            file.truncate(data_start + offset)
+        os.replace(temporary, cache_path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+class GameMap:
+    """
+    A compiled map, memory-mapped from its binary cache.
+    Loading reads only the small header; the path tables, the buildable
+    bitmap and the coverage tables are views into the mapped file, paged in
+    when first used. The cache is compiled again whenever the map source
+    changes, so editing a map never requires a manual step.
+    """
+    def __init__(self, cache_path):
+        """
+        Map a compiled map file.
+        Args:
+            cache_path (str): File path of the compiled map.
+        Attributes:
+            source (str): SHA-1 digest of the map source the cache was compiled from.
+            screen_size (tuple): Width and height of the game screen in pixels.
+            cols (int): Number of grid columns.
+            rows (int): Number of grid rows.
+            cell_size (tuple): Size of each grid cell (width, height).
+            background (str): File path of the background image.
+            coverage_ranges (list): Tower ranges of the coverage tables.
+            buildable (ndarray): For every (col, row), whether a tower may be placed there.
+            coverage_length (ndarray): Path length within each range of each buildable cell's
+                center, indexed by (col, row, range, path); 0 for other cells.
+            coverage_span (ndarray): Distances along the path where that coverage starts and ends,
+                indexed by (col, row, range, path, 0 or 1); NaN where the path is out of reach.
+            compiled_paths (list): CompiledPath of every path, built from the mapped tables.
+        """
+        with open(cache_path, 'rb') as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if self._buffer[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{cache_path} is not a compiled map")
+            version, header_length = struct.unpack_from('<II', self._buffer, len(MAGIC))
+            if version != FORMAT_VERSION:
+                raise ValueError(f"{cache_path} has map format {version}, expected {FORMAT_VERSION}")
+            header_start = len(MAGIC) + 8
+            header = json.loads(self._buffer[header_start:header_start + header_length])
+        except (ValueError, struct.error):
+            self._buffer.close()
+            raise
+        data_start = -(-(header_start + header_length) // ALIGNMENT) * ALIGNMENT
+
+        self.source = header['source']
+        self.screen_size = tuple(header['screen'])
+        self.cols = header['grid']['cols']
+        self.rows = header['grid']['rows']
+        self.cell_size = tuple(header['grid']['cell_size'])
+        self.background = header['background']
+        self.coverage_ranges = header['coverage_ranges']
+        arrays = {}
+        for name, spec in header['arrays'].items():
+            count = int(np.prod(spec['shape']))
+            arrays[name] = np.frombuffer(self._buffer, dtype=spec['dtype'], count=count,
+                                         offset=data_start + spec['offset']).reshape(spec['shape'])
+        self.buildable = np.unpackbits(arrays['buildable'], count=self.cols * self.rows).astype(bool).reshape(
+            self.cols, self.rows)
+        self.coverage_length = arrays['coverage_length']
+        self.coverage_span = arrays['coverage_span']
+        self.compiled_paths = [
+            CompiledPath.from_tables(arrays[f'path{index}_points'], arrays[f'path{index}_lengths'],
+                                     arrays[f'path{index}_directions'], arrays[f'path{index}_cumulative'])
+            for index in range(header['paths'])
+        ]
+
+    @classmethod
+    def load(cls, source_path, cache_dir):
+        """
+        Load a map, compiling it first if its cache is missing, out of date, unreadable
+        or written in another map format.
+        Args:
+            source_path (str): File path of the map source.
+            cache_dir (str): Directory of the compiled maps.
+        Returns:
+            GameMap: The compiled map.
+        """
+        name = os.path.splitext(os.path.basename(source_path))[0]
+        cache_path = os.path.join(cache_dir, f"{name}.tdmap")
+        with open(source_path, 'rb') as file:
+            digest = hashlib.sha1(file.read()).hexdigest()
+        if os.path.exists(cache_path):
+            try:
+                game_map = cls(cache_path)
+                if game_map.source == digest:
+                    return game_map
+                game_map.close()
+            except (ValueError, KeyError, struct.error):
+                pass
+        compile_map(source_path, cache_path)
+        return cls(cache_path)
+
+    @property
+    def paths(self):
+        """
+        list: Points of every path as lists of (x, y) tuples.
+        """
+        return [[tuple(point) for point in path.points.tolist()] for path in self.compiled_paths]
+
+    @property
+    def tower_positions(self):
+        """
+        list: Centers of the buildable cells, column by column.
+        """
+        cells = np.argwhere(self.buildable)
+        return [(int(col) * self.cell_size[0] + self.cell_size[0] // 2,
+                 int(row) * self.cell_size[1] + self.cell_size[1] // 2) for col, row in cells]
+
+    def coverage(self, cell, tower_range, path_index):
+        """
+        Return how much of a path a tower on a cell reaches.
+        Args:
+            cell (tuple): The (col, row) of the cell.
+            tower_range (float): Range of the tower; must be one of the coverage ranges.
+            path_index (int): Index of the path.
+        Returns:
+            tuple: Covered path length, and the distances along the path where the
+                coverage starts and ends (NaN when the path is out of reach).
+        """
+        range_index = self.coverage_ranges.index(tower_range)
+        start, end = self.coverage_span[cell[0], cell[1], range_index, path_index]
+        return float(self.coverage_length[cell[0], cell[1], range_index, path_index]), float(start), float(end)
+
+    def close(self):
+        """
+        Release the mapped file. The arrays of the map must not be used afterwards.
+        """
+        self.compiled_paths = []
+        self.coverage_length = self.coverage_span = None
+        self._buffer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile Tower Defense maps into their binary cache.")
+    parser.add_argument('maps', nargs='+', help="map source files")
+    parser.add_argument('--cache-dir', default='maps/cache', help="directory of the compiled maps")
+    args = parser.parse_args(argv)
+    for source_path in args.maps:
+        name = os.path.splitext(os.path.basename(source_path))[0]
+        cache_path = os.path.join(args.cache_dir, f"{name}.tdmap")
+        compile_map(source_path, cache_path)
+        game_map = GameMap(cache_path)
+        print(f"{source_path} -> {cache_path}: {game_map.cols}x{game_map.rows} cells, "
+              f"{len(game_map.compiled_paths)} paths, {int(game_map.buildable.sum())} buildable, "
+              f"{os.path.getsize(cache_path)} bytes")
+        game_map.close()
+
+
+if __name__ == '__main__':
+    main()
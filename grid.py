@@ -1,4 +1,5 @@
 import pygame
+import numpy as np
 
 
 class Grid:
@@ -6,6 +7,8 @@ class Grid:
     Represents the game grid, where towers can be placed.
     This class manages the grid's available spots, handles placing and removing towers,
     and provides utility methods for interacting with the grid.
+    Every cell is indexed by (col, row), so availability checks, placement and
+    finding the tower under the mouse are constant-time lookups.
     """
     def __init__(self, game):
         """
@@ -15,14 +18,28 @@ class Grid:
         Attributes:
             settings: Reference to the game's settings.
             screen: Reference to the game's screen.
-            available_spots (list): List of positions where towers can be placed.
-            towers (list): List of towers currently placed on the grid.
+            cell_size (tuple): Size of each grid cell (width, height).
+            buildable (ndarray): For every (col, row), whether a tower may be placed there.
+            occupants (ndarray): For every (col, row), the tower placed there, or None.
         """
         self.game = game
         self.settings = game.settings
         self.screen = game.screen
-        self.available_spots = self.settings.tower_positions
-        self.towers = []
+        self.cell_size = self.settings.grid_size
+        self.buildable = np.zeros((self.settings.cols, self.settings.rows), dtype=bool)
+        self.occupants = np.full((self.settings.cols, self.settings.rows), None, dtype=object)
+        for spot in self.settings.tower_positions:
+            cell = self.get_cell(spot)
+            if cell:
+                self.buildable[cell] = True
+
+    @property
+    def available_spots(self):
+        """
+        list: Centers of the buildable cells without a tower, column by column.
+        """
+        free = self.buildable & np.equal(self.occupants, None)
+        return [self.get_cell_center(cell) for cell in map(tuple, np.argwhere(free).tolist())]
 
     def update(self):
         """
@@ -31,26 +48,31 @@ class Grid:
         """
         pass
 
-    def draw(self):
+    def draw(self, screen=None):
         """
-        Draw the available tower spots on the screen.
-        Available spots are displayed as circles.
+        Draw the tower spots on the screen.
+        Every buildable spot is marked with a dot, and available spots are circled.
+        Args:
+            screen (pygame.Surface, optional): Surface to draw on. Defaults to the game screen.
         """
+        screen = screen or self.screen
+        for cell in map(tuple, np.argwhere(self.buildable).tolist()):
+            pygame.draw.circle(screen, (128, 0, 0), self.get_cell_center(cell), 10)
         for spot in self.available_spots:
-            pygame.draw.circle(self.screen, (255, 255, 0), spot, 15, 2)
+            pygame.draw.circle(screen, (255, 255, 0), spot, 15, 2)
 
     def place_tower(self, tower=None):
         """
         Attempt to place a tower on the grid.
-        Checks if the position is available and not overlapping with an existing tower.
+        Checks if the position is available and not occupied by an existing tower.
         Args:
             tower: The tower object to be placed.
         Returns:
             bool: True if the tower was successfully placed, False otherwise.
         """
         grid_pos = self.get_grid_position(tower.position)
-        if grid_pos in self.available_spots and not any(tower.rect.collidepoint(grid_pos) for tower in self.towers):
-            self.towers.append(tower)
+        if self.is_spot_available(grid_pos):
+            self.occupants[self.get_cell(grid_pos)] = tower
             return True
         return False
 
@@ -60,8 +82,33 @@ class Grid:
         Args:
             tower: The tower object to be removed.
         """
-        if tower in self.towers:
-            self.towers.remove(tower)
+        cell = self.get_cell(tower.position)
+        if cell and self.occupants[cell] is tower:
+            self.occupants[cell] = None
+
+    def get_cell(self, pos):
+        """
+        Get the (col, row) index of the cell containing a position.
+        Args:
+            pos (tuple): Screen coordinates (x, y).
+        Returns:
+            tuple: The (col, row) index, or None if the position is outside the grid.
+        """
+        col, row = int(pos[0] // self.cell_size[0]), int(pos[1] // self.cell_size[1])
+        if 0 <= col < self.buildable.shape[0] and 0 <= row < self.buildable.shape[1]:
+            return col, row
+        return None
+
+    def get_cell_center(self, cell):
+        """
+        Get the screen coordinates of the center of a cell.
+        Args:
+            cell (tuple): The (col, row) index of the cell.
+        Returns:
+            tuple: The center coordinates (x, y).
+        """
+        return (cell[0] * self.cell_size[0] + self.cell_size[0] // 2,
+                cell[1] * self.cell_size[1] + self.cell_size[1] // 2)
 
     def get_grid_position(self, mouse_pos):
         """
@@ -72,8 +119,9 @@ class Grid:
         Returns:
             tuple: The center coordinates of the nearest grid cell.
         """
-        grid_x = mouse_pos[0] // 64 * 64 + 32
-        grid_y = mouse_pos[1] // 64 * 64 + 32
+        width, height = self.cell_size
+        grid_x = mouse_pos[0] // width * width + width // 2
+        grid_y = mouse_pos[1] // height * height + height // 2
         return grid_x, grid_y
 
     def is_spot_available(self, grid_pos):
@@ -84,4 +132,16 @@ class Grid:
         Returns:
             bool: True if the position is available, False otherwise.
         """
-        return grid_pos in self.available_spots and all(not tower.rect.collidepoint(grid_pos) for tower in self.towers)
+        cell = self.get_cell(grid_pos)
+        return cell is not None and bool(self.buildable[cell]) and self.occupants[cell] is None
+
+    def tower_at(self, pos):
+        """
+        Get the tower placed in the cell containing a position.
+        Args:
+            pos (tuple): Screen coordinates (x, y).
+        Returns:
+            Tower: The tower in that cell, or None if the cell is empty or outside the grid.
+        """
+        cell = self.get_cell(pos)
+        return self.occupants[cell] if cell else None
@@ -0,0 +1,211 @@
+import argparse
+import json
+import os
+import time
+import pygame
+from settings import Settings
+from assets import AssetManager
+from sound import SoundBank
+from clock import SimulatedClock
+from profiler import FrameProfiler
+from level import Level
+from grid import Grid
+from tower import TOWER_CLASSES
+
+
+TOWER_NAMES = {tower_class: name for name, tower_class in TOWER_CLASSES.items()}
+
+
+class HeadlessGame:
+    """
+    Runs the game without a window, audio or frame limit.
+    The level is driven by the same fixed-step simulated clock as the
+    interactive game, so a whole game runs as fast as the CPU allows and
+    produces exactly the same results.
+    Towers are placed from a scripted layout and the waves are built from a
+    seed, which makes every run reproducible.
+    """
+    def __init__(self, seed=None, layout=(), money=None, settings=None, endless=False, map_file=None,
+                 strategy=None, analytic_bullets=False):
+        """
+        Initialize the headless game.
+        Args:
+            seed (int, optional): Seed for the random wave composition. Defaults to None.
+            layout (list, optional): Towers to place before the first update, as dicts with
+                'type', 'pos' and optionally 'upgrades'. Defaults to no towers.
+            money (int, optional): Override of the starting money. Defaults to None.
+            settings (Settings, optional): Game settings to use. Defaults to new Settings.
+            endless (bool, optional): Whether endless waves follow the scripted ones. Defaults to False.
+            map_file (str, optional): Map source file to play on. Defaults to the map of the settings.
+            strategy (callable, optional): Called with the game before every tick to build and
+                upgrade towers during the game. Defaults to None.
+            analytic_bullets (bool, optional): Whether hits are scheduled at the computed impact tick.
+                Defaults to False.
+        """
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        pygame.display.init()
+        pygame.font.init()
+        self.settings = settings or Settings()
+        if endless:
+            self.settings.endless_mode = True
+        if analytic_bullets:
+            self.settings.analytic_bullets = True
+        if map_file and map_file != self.settings.map_file:
+            self.settings.load_map(map_file)
+        if money is not None:
+            self.settings.starting_money = money
+        # convert_alpha needs a display surface, even a tiny one.
+        self.screen = pygame.display.set_mode((1, 1))
+        self.assets = AssetManager()
+        self.assets.preload(self.settings.preload_images)
+        self.assets.preload_rotations(self.settings.rotating_sprites, self.settings.rotation_steps)
+        self.sounds = SoundBank(self.settings, muted=True)
+        self.sim_clock = SimulatedClock(self.settings.fps)
+        self.profiler = FrameProfiler()
+        self.font = None
+        self.selected_tower_type = 'basic'
+        self.is_game_over = False
+        self.strategy = strategy
+
+        self.level = Level(self, seed)
+        self.grid = Grid(self)
+        self.place_towers(layout)
+
+    def game_over(self):
+        self.is_game_over = True
+
+    def place_towers(self, layout):
+        """
+        Place and upgrade the towers of a scripted layout. Towers and upgrades that cannot
+        be afforded are skipped, as in the game.
+        Args:
+            layout (list): Towers as dicts with 'type', 'pos' and optionally 'upgrades'
+                and 'targeting', the tower's targeting policy.
+        """
+        for entry in layout:
+            count = len(self.level.towers)
+            self.level.attempt_place_tower(tuple(entry['pos']), entry['type'])
+            if len(self.level.towers) == count:
+                continue
+            tower = self.level.towers.sprites()[-1]
+            tower.targeting = entry.get('targeting', tower.targeting)
+            for _ in range(entry.get('upgrades', 0)):
+                if self.settings.starting_money < tower.upgrade_cost_at(self.settings, tower.level + 1):
+                    print("Not enough money to upgrade tower.")
+                    break
+                tower.upgrade(tower)
+
+    def step(self):
+        """
+        Advance the game by one simulation tick, like TowerDefenseGame._update_game.
+        """
+        if self.strategy:
+            self.strategy(self)
+        self.sim_clock.advance()
+        self.level.update()
+        self.grid.update()
+        if len(self.level.enemies) == 0 and not self.level.all_waves_complete:
+            self.level.start_next_wave()
+
+    def run(self, max_ticks=None):
+        """
+        Run the game until all waves are complete, the game is lost, or max_ticks ticks ran.
+        Args:
+            max_ticks (int, optional): Maximum number of ticks to simulate. Defaults to None.
+        Returns:
+            dict: Outcome of the game with per-wave results, the damage dealt by every tower,
+                pool usage, and timing.
+        """
+        waves = []
+        wave = self.level.current_wave
+        kills = leaks = 0
+        start = time.perf_counter()
+        while not (self.level.all_waves_complete or self.is_game_over):
+            if max_ticks is not None and self.sim_clock.ticks >= max_ticks:
+                break
+            self.step()
+            if self.level.current_wave != wave or self.level.all_waves_complete or self.is_game_over:
+                waves.append({
+                    'wave': wave + 1,
+                    'tick': self.sim_clock.ticks,
+                    'kills': self.level.kills - kills,
+                    'leaks': self.level.leaks - leaks,
+                    'money': self.settings.starting_money,
+                })
+                wave = self.level.current_wave
+                kills, leaks = self.level.kills, self.level.leaks
+        elapsed = time.perf_counter() - start
+        return {
+            'won': self.level.all_waves_complete and not self.is_game_over,
+            'lost': self.is_game_over,
+            'ticks': self.sim_clock.ticks,
+            'money': self.settings.starting_money,
+            'kills': self.level.kills,
+            'leaks': self.level.leaks,
+            'waves': waves,
+            'towers': [{'type': TOWER_NAMES[type(tower)], 'pos': tuple(map(int, tower.position)),
+                        'level': tower.level, 'damage': tower.damage_dealt} for tower in self.level.towers],
+            'pools': self.level.pool_stats(),
+            'elapsed': elapsed,
+        }
+
+
+def parse_tower(value):
+    """
+    Parse a --tower argument of the form TYPE:X,Y or TYPE:X,Y:UPGRADES.
+    """
+    parts = value.split(':')
+    if len(parts) not in (2, 3):
+        raise argparse.ArgumentTypeError(f"Invalid tower '{value}', expected TYPE:X,Y[:UPGRADES]")
+    x, y = (int(coordinate) for coordinate in parts[1].split(','))
+    tower = {'type': parts[0], 'pos': (x, y)}
+    if len(parts) == 3:
+        tower['upgrades'] = int(parts[2])
+    return tower
+
+
+def print_result(result, fps):
+    """
+    Print the per-wave results and timing of a headless run.
+    """
+    print(f"{'Wave':>4} {'Tick':>7} {'Kills':>5} {'Leaks':>5} {'Money':>7}")
+    for wave in result['waves']:
+        print(f"{wave['wave']:>4} {wave['tick']:>7} {wave['kills']:>5} {wave['leaks']:>5} {wave['money']:>7}")
+    outcome = 'won' if result['won'] else 'lost' if result['lost'] else 'stopped'
+    game_seconds = result['ticks'] / fps
+    speedup = game_seconds / result['elapsed'] if result['elapsed'] else float('inf')
+    print(f"Game {outcome} after {result['ticks']} ticks ({game_seconds:.1f}s of game time) "
+          f"in {result['elapsed']:.3f}s, {speedup:.0f}x real time.")
+    enemies, bullets = result['pools']['enemies'], result['pools']['bullets']
+    print(f"Enemy pool: {enemies['created']} created, {enemies['reused']} reused, peak {enemies['peak']} live; "
+          f"bullets: peak {bullets['peak']} of {bullets['capacity']} rows.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Tower Defense Game without a display.")
+    parser.add_argument('--seed', type=int, default=None, help="seed for the wave composition")
+    parser.add_argument('--layout', help="JSON file with a list of towers ({'type', 'pos', 'upgrades'})")
+    parser.add_argument('--tower', type=parse_tower, action='append', default=[],
+                        help="tower to place, as TYPE:X,Y or TYPE:X,Y:UPGRADES; may be repeated")
+    parser.add_argument('--money', type=int, default=None, help="override the starting money")
+    parser.add_argument('--max-ticks', type=int, default=None, help="stop after this many ticks")
+    parser.add_argument('--endless', action='store_true', help="keep sending waves of rising difficulty")
+    parser.add_argument('--map', help="map source file to play on")
+    parser.add_argument('--analytic-bullets', action='store_true',
+                        help="schedule hits at the computed impact tick instead of testing collisions")
+    args = parser.parse_args(argv)
+
+    layout = []
+    if args.layout:
+        with open(args.layout) as file:
+            layout = json.load(file)
+    layout += args.tower
+
+    game = HeadlessGame(seed=args.seed, layout=layout, money=args.money, endless=args.endless, map_file=args.map,
+                        analytic_bullets=args.analytic_bullets)
+    result = game.run(args.max_ticks)
+    print_result(result, game.settings.fps)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,14 @@
 import pygame
-from random import choice, choices
-from enemy import Enemy
-from tower import BasicTower, SniperTower, FreezingTower
+from random import Random
+from enemy import EnemyPool
+from enemy_manager import EnemyManager
+from aura import AuraField
+from paths import PathTable
+from tower import TOWER_CLASSES, FreezingTower
+from bullet import BulletManager
+from waves import WaveStream
+from targeting import TargetingIndex
+from scheduler import TowerScheduler
 
 
 class Level:
@@ -10,69 +17,88 @@ class Level:
     This class handles spawning enemies, placing towers, managing bullets,
     and updating the state of the game level during gameplay.
     """
-    def __init__(self, game):
+    def __init__(self, game, seed=None):
         """
         Initialize the level.
         Args:
             game: Reference to the main game instance.
+            seed (int, optional): Seed for the random wave composition. Defaults to None.
         Attributes:
+            rng (random.Random): Random generator used to build the waves.
+            enemy_manager (EnemyManager): Array storage that moves all enemies at once.
+            enemy_pool (EnemyPool): Spare enemy sprites reused for new spawns.
             enemies (pygame.sprite.Group): Group containing all enemies in the level.
             towers (pygame.sprite.Group): Group containing all towers in the level.
-            bullets (pygame.sprite.Group): Group containing all bullets in the level.
-            enemy (list): List of enemy templates with their attributes.
-            waves (list): List of waves, each containing enemy instances with paths.
+            bullets (BulletManager): Array storage of all bullets in flight; freezing tower bullets are not drawn.
+            paths (PathTable): Enemy paths compiled with arc-length parametrization.
+            auras (AuraField): Precomputed lookup of the tower auras along the enemy paths.
+            targeting (TargetingIndex): Answers the target queries of the towers.
+            scheduler (TowerScheduler): Wakes the towers that are off cooldown and have an enemy in range.
+            waves (WaveStream): Generator of the waves, built one at a time from the wave file.
+            wave (Wave): The current wave.
             current_wave (int): Index of the current wave.
             spawned_enemies (int): Number of enemies spawned in the current wave.
-            spawn_delay (int): Time delay between spawning enemies in milliseconds.
+            spawn_delay (int): Time delay between spawning enemies of the current wave in milliseconds.
             last_spawn_time (int): Time when the last enemy was spawned.
             all_waves_complete (bool): Indicates if all waves are completed.
+            kills (int): Number of enemies killed by towers.
+            leaks (int): Number of enemies that reached the end of their path.
+            layout_version (int): Number of tower placements and upgrades so far, used by
+                callers caching drawings of the layout.
             font (pygame.font.Font): Font used for rendering tower stats.
         """
         self.game = game
+        self.rng = Random(seed)
         self.enemies = pygame.sprite.Group()
         self.towers = pygame.sprite.Group()
-        self.bullets = pygame.sprite.Group()
-        self.enemy = [
-            {'speed': 1, 'health': 100, 'image_path': 'assets/enemies/basic_enemy.png'},
-            {'speed': 1.5, 'health': 150, 'image_path': 'assets/enemies/fast_enemy.png'},
-            {'speed': 0.75, 'health': 200, 'image_path': 'assets/enemies/strong_enemy.png'},
-            {'speed': 0.65, 'health': 250, 'image_path': 'assets/enemies/strong_enemy.png'},
-        ]
-        self.waves = [
-            [{'path': path, **enemy} for path in [choice(self.game.settings.enemy_path)] for enemy in
-             choices(self.enemy, weights=[3, 2, 0, 0], k=5)],
-            [{'path': path, **enemy} for path in [choice(self.game.settings.enemy_path)] for enemy in
-             choices(self.enemy, weights=[2, 2, 1, 0], k=7)],
-            [{'path': path, **enemy} for path in [choice(self.game.settings.enemy_path)] for enemy in
-             choices(self.enemy, weights=[1, 1, 1, 1], k=4)],
-            [{'path': path, **enemy} for path in [choice(self.game.settings.enemy_path)] for enemy in
-             choices(self.enemy, weights=[0, 1, 2, 2], k=5)],
-            [{'path': path, **enemy} for path in [choice(self.game.settings.enemy_path)] for enemy in
-             choices(self.enemy, weights=[0, 2, 2, 2], k=6)],
-            [{'path': path, **enemy} for path in [choice(self.game.settings.enemy_path)] for enemy in
-             choices(self.enemy, weights=[0, 1, 3, 2], k=7)],
-            [{'path': path, **enemy} for path in [choice(self.game.settings.enemy_path)] for enemy in
-             choices(self.enemy, weights=[0, 1, 2, 3], k=6)],
-            [{'path': path, **enemy} for path in [choice(self.game.settings.enemy_path)] for enemy in
-             choices(self.enemy, weights=[0, 0, 4, 2], k=6)],
-            [{'path': path, **enemy} for path in [choice(self.game.settings.enemy_path)] for enemy in
-             choices(self.enemy, weights=[0, 0, 3, 3], k=6)]
-        ]
+        self.bullets = BulletManager(self.game, self.game.assets.image(self.game.settings.bullet_sprite),
+                                     hidden_towers=(FreezingTower,),
+                                     analytic=self.game.settings.analytic_bullets)
+        self.paths = PathTable(self.game.settings.enemy_path, self.game.settings.map.compiled_paths)
+        self.auras = AuraField(self)
+        self.targeting = TargetingIndex(self)
+        self.scheduler = TowerScheduler(self)
+        self.enemy_manager = EnemyManager(self)
+        self.enemy_pool = EnemyPool(self.game, self.enemy_manager)
+        settings = self.game.settings
+        self.waves = WaveStream.load(settings.waves_file, self.rng, settings.enemy_path, settings.enemy_sprites,
+                                     settings.endless_mode)
+        self.wave = next(self.waves)
         self.current_wave = 0
         self.spawned_enemies = 0
-        self.spawn_delay = 1000
-        self.last_spawn_time = pygame.time.get_ticks()
+        self.spawn_delay = self.wave.spawn_interval
+        self.last_spawn_time = self.game.sim_clock.get_ticks()
         self.all_waves_complete = False
+        self.kills = 0
+        self.leaks = 0
+        self.layout_version = 0
         self.start_next_wave()
         self.font = pygame.font.SysFont("Arial", 24)
 
+    @property
+    def waves_left(self):
+        """
+        int: Number of waves left including the current one, or None in endless mode.
+        """
+        if self.waves.total is None:
+            return None
+        return self.waves.total - self.current_wave
+
+    def has_next_wave(self):
+        """
+        Return True if another wave follows the current one.
+        """
+        return self.waves.total is None or self.current_wave < self.waves.total - 1
+
     def start_next_wave(self):
         """
         Start the next wave of enemies.
         Resets the enemy spawn counter and begins spawning enemies for the next wave.
         """
-        if self.current_wave < len(self.waves):
+        if self.wave:
+            self.enemy_pool.reserve(len(self.wave))
             self.spawned_enemies = 0
+            self.spawn_delay = self.wave.spawn_interval
             self.spawn_next_enemy()
 
     def spawn_next_enemy(self):
@@ -81,12 +107,22 @@ class Level:
         Retrieves enemy data from the current wave and adds the enemy to the game.
         Plays a sound effect when an enemy spawns.
         """
-        if self.spawned_enemies < len(self.waves[self.current_wave]):
-            enemy_info = self.waves[self.current_wave][self.spawned_enemies]
-            new_enemy = Enemy(**enemy_info, game=self.game)
+        if self.spawned_enemies < len(self.wave):
+            enemy_info = self.wave.enemies[self.spawned_enemies]
+            new_enemy = self.enemy_pool.acquire(**enemy_info)
             self.enemies.add(new_enemy)
             self.spawned_enemies += 1
-            pygame.mixer.Sound(self.game.settings.enemy_appear).play()
+            self.game.sounds.play('enemy_appear')
+
+    def pool_stats(self):
+        """
+        Return the usage of the enemy pool and the bullet arrays.
+        Returns:
+            dict: 'enemies' as returned by EnemyPool.stats, and the high-water mark and
+                row capacity of the 'bullets'.
+        """
+        return {'enemies': self.enemy_pool.stats(),
+                'bullets': {'peak': self.bullets.peak, 'capacity': self.bullets.capacity}}
 
     def attempt_place_tower(self, mouse_pos, tower_type):
         """
@@ -97,83 +133,105 @@ class Level:
             mouse_pos (tuple): The position of the mouse click.
             tower_type (str): The type of tower to place (e.g., 'basic', 'sniper', 'freezer').
         """
-        tower_classes = {'basic': BasicTower, 'sniper': SniperTower, 'freezer': FreezingTower}
-        if tower_type in tower_classes and self.game.settings.starting_money >= self.game.settings.tower_cost:
+        if tower_type in TOWER_CLASSES and self.game.settings.starting_money >= self.game.settings.tower_cost:
             grid_pos = self.game.grid.get_grid_position(mouse_pos)
             if self.game.grid.is_spot_available(grid_pos):
-                self.game.grid.available_spots.remove(grid_pos)
                 self.game.settings.starting_money -= self.game.settings.tower_cost
-                new_tower = tower_classes[tower_type](grid_pos, self.game)
+                new_tower = TOWER_CLASSES[tower_type](grid_pos, self.game)
+                self.game.grid.place_tower(new_tower)
                 self.towers.add(new_tower)
+                self.tower_changed(new_tower)
                 print("Tower placed.")
             else:
                 print("Invalid position for tower.")
         else:
             print("Not enough money or unknown tower type.")
 
+    def tower_changed(self, tower):
+        """
+        Refresh the data derived from the tower layout.
+        Must be called whenever a tower is placed or upgraded.
+        Args:
+            tower (Tower): The placed or upgraded tower.
+        """
+        self.layout_version += 1
+        self.scheduler.schedule(tower)
+        if tower.aura:
+            self.auras.invalidate()
+
     def update(self):
         """
         Update the state of the level.
         Spawns enemies, updates positions of enemies and bullets, handles collisions,
         and checks for wave completion.
         """
-        current_time = pygame.time.get_ticks()
+        current_time = self.game.sim_clock.get_ticks()
+        profiler = self.game.profiler
 
-        if self.current_wave < len(self.waves) and self.spawned_enemies < len(self.waves[self.current_wave]):
-            if current_time - self.last_spawn_time > self.spawn_delay:
-                enemy_info = self.waves[self.current_wave][self.spawned_enemies].copy()
-                enemy_info['game'] = self.game
-                new_enemy = Enemy(**enemy_info)
-                self.enemies.add(new_enemy)
-                self.spawned_enemies += 1
-                self.last_spawn_time = current_time
+        with profiler.zone('spawn'):
+            if self.wave and self.spawned_enemies < len(self.wave):
+                if current_time - self.last_spawn_time > self.spawn_delay:
+                    new_enemy = self.enemy_pool.acquire(**self.wave.enemies[self.spawned_enemies])
+                    self.enemies.add(new_enemy)
+                    self.spawned_enemies += 1
+                    self.last_spawn_time = current_time
 
-        collisions = pygame.sprite.groupcollide(self.bullets, self.enemies, True, False)
-        for bullet in collisions:
-            for enemy in collisions[bullet]:
-                enemy.take_damage(bullet.damage)
+        with profiler.zone('collisions'):
+            if self.bullets.analytic:
+                self.bullets.resolve()
+            else:
+                self.bullets.collide(self.enemy_manager)
 
-        self.enemies.update()
-        for tower in self.towers:
-            tower.update(self.enemies, current_time, self.bullets)
-        self.bullets.update()
+        with profiler.zone('enemies'):
+            self.enemy_manager.update()
+        with profiler.zone('towers'):
+            self.scheduler.update(current_time)
+        with profiler.zone('bullets'):
+            self.bullets.update()
 
-        if len(self.enemies) == 0 and self.current_wave < len(self.waves) - 1:
+        if len(self.enemies) == 0 and self.has_next_wave():
             self.current_wave += 1
+            self.wave = next(self.waves)
             self.start_next_wave()
-        elif len(self.enemies) == 0 and self.current_wave == len(self.waves) - 1:
+        elif len(self.enemies) == 0:
             self.all_waves_complete = True
 
     def draw_path(self, screen):
         """
-        Draw the enemy paths and tower positions.
+        Draw the enemy paths.
         Args:
             screen: The game screen to draw on.
         """
         for i in self.game.settings.enemy_path:
             pygame.draw.lines(screen, (0, 128, 0), False, i, 5)
-        for pos in self.game.settings.tower_positions:
-            pygame.draw.circle(screen, (128, 0, 0), pos, 10)
 
-    def draw(self, screen):
+    def draw(self, screen, alpha=1.0):
         """
         Render the level on the screen.
-        This includes enemy paths, enemies, towers, bullets, and stats.
+        This includes enemies, towers, bullets, and stats. The enemy paths are part
+        of the static scene and are drawn by draw_path.
+        Moving sprites are drawn between their last two simulated positions.
         Args:
             screen: The game screen to draw on.
+            alpha (float, optional): Fraction of a tick elapsed since the last update. Defaults to 1.0.
+        Returns:
+            list: Screen regions drawn on.
         """
-        self.draw_path(screen)
-        self.enemies.draw(screen)
-        for enemy in self.enemies:
-            enemy.draw_health_indicator(screen)
-        self.towers.draw(screen)
-        for bullet in self.bullets:
-            if not isinstance(bullet.tower, FreezingTower):
-                screen.blit(bullet.image, bullet.rect)
-        mouse_pos = pygame.mouse.get_pos()
-        for tower in self.towers:
-            tower.draw(screen)
-            if tower.is_hovered(mouse_pos):
-                tower_stats_text = self.font.render(f"Damage: {round(tower.damage)}, Range: {tower.tower_range}", True,
-                                                    (255, 255, 255))
-                screen.blit(tower_stats_text, (tower.rect.x, tower.rect.y - 20))
\ No newline at end of file
+        profiler = self.game.profiler
+        with profiler.zone('draw enemies'):
+            rects = self.enemy_manager.draw(screen, alpha)
+        with profiler.zone('draw towers'):
+            self.towers.draw(screen)
+            rects.extend(tower.rect for tower in self.towers)
+        with profiler.zone('draw bullets'):
+            rects.extend(self.bullets.draw(screen, alpha))
+        with profiler.zone('draw tooltips'):
+            hovered = self.game.grid.tower_at(pygame.mouse.get_pos())
+            for tower in self.towers:
+                rects.extend(tower.draw(screen, tower is hovered))
+                if tower is hovered:
+                    tower_stats_text = self.game.text.render(
+                        self.font, f"Damage: {round(tower.damage)}, Range: {tower.tower_range}, "
+                                   f"Target: {tower.targeting}", (255, 255, 255))
+                    rects.append(screen.blit(tower_stats_text, (tower.rect.x, tower.rect.y - 20)))
+        return rects
\ No newline at end of file
@@ -1,41 +1,145 @@
+import argparse
 import pygame
+import random
 import sys
 from settings import Settings
+from assets import AssetManager, find_images
+from sound import SoundBank
+from clock import SimulatedClock
 from level import Level
 from grid import Grid
+from tower import Tower
+from renderer import DirtyRectRenderer
+from text import TextCache, TextWidget
+from replay import InputRecorder, apply_command, report
+from profiler import FrameProfiler
 
 
 class TowerDefenseGame:
-    def __init__(self):
+    def __init__(self, seed=None, replay=None, profile=False, endless=False, map_file=None, analytic_bullets=False):
         """
         Initialize the Tower Defense Game.
         This method sets up the game settings, screen, background, levels, and
         other game components. It also initializes fonts, selected tower type,
         and game-over state.
+        Args:
+            seed (int, optional): Seed for the random wave composition. Defaults to a random seed.
+            replay (ReplayPlayer, optional): Recording to play back instead of taking the
+                player's commands. Defaults to None.
+            profile (bool, optional): Whether the frame profiler starts enabled. Defaults to False.
+            endless (bool, optional): Whether endless waves follow the scripted ones. Defaults to False.
+            map_file (str, optional): Map source file to play on. Defaults to Settings.map_file.
+            analytic_bullets (bool, optional): Whether hits are scheduled at the computed impact tick.
+                Defaults to False.
         """
         pygame.init()
         self.settings = Settings()
+        self.settings.endless_mode = endless
+        self.settings.analytic_bullets = analytic_bullets
+        if replay:
+            map_file = replay.map_file
+        if map_file and map_file != self.settings.map_file:
+            self.settings.load_map(map_file)
+        self.profiler = FrameProfiler(profile, self.settings.profiler_history, self.settings.profiler_frames)
+        self.replay = replay
+        if replay:
+            seed = replay.seed
+            self.settings.starting_money = replay.money
+            self.settings.endless_mode = replay.endless
+            self.settings.analytic_bullets = replay.analytic_bullets
+        self.seed = seed if seed is not None else random.randrange(2 ** 31)
+        self.recorder = None if replay else InputRecorder(self.seed, self.settings.starting_money,
+                                                          self.settings.endless_mode, self.settings.map_file,
+                                                          self.settings.analytic_bullets)
         self.screen = pygame.display.set_mode((self.settings.screen_width, self.settings.screen_height))
         pygame.display.set_caption("Tower Defense Game")
         self.clock = pygame.time.Clock()
+        self.sim_clock = SimulatedClock(self.settings.fps)
 
-        self.background = pygame.image.load(self.settings.background_image).convert()
-        self.background = pygame.transform.scale(self.background,
-                                                 (self.settings.screen_width, self.settings.screen_height))
+        self.assets = AssetManager()
+        self._load_assets()
+        self.assets.preload_rotations(self.settings.rotating_sprites, self.settings.rotation_steps)
+        print(f"Rotation atlases: {len(self.assets.atlases)} sprites, "
+              f"{self.assets.atlas_bytes() / 2 ** 20:.1f} MB")
+        self.background = self.assets.image(self.settings.background_image, alpha=False,
+                                            size=(self.settings.screen_width, self.settings.screen_height))
+        self.sounds = SoundBank(self.settings, assets=self.assets)
 
-        self.level = Level(self)
+        self.level = Level(self, self.seed)
         self.grid = Grid(self)
 
         self.font = pygame.font.SysFont("Arial", 24)
+        self.text = TextCache(self.settings.text_cache_size)
+        self.hud = [
+            TextWidget(self.text, self.font, "Money: ${}", (10, 10)),
+            TextWidget(self.text, self.font, "Selected Tower: {}", (10, 40)),
+            TextWidget(self.text, self.font, "Waves Left: {}", (10, 70)),
+            TextWidget(self.text, self.font, "Enemies Left: {}", (10, 100)),
+        ]
 
         self.selected_tower_type = 'basic'
         self.is_game_over = False
         self.hide_towers = 0
         self.hide_tower_positions()
+        self.renderer = DirtyRectRenderer(self.screen, self._draw_static, self.settings.dirty_rects,
+                                          self.settings.show_dirty_rects, self.settings.full_redraw_ratio)
 
     def game_over(self):
         self.is_game_over = True
 
+    def _load_assets(self):
+        """
+        Decode every image of the asset directory and every sound effect behind a loading screen.
+        Decoding runs on a pool of threads while this thread converts the images
+        and draws the progress, so the first wave never waits for a file.
+        Prints the total load time and the slowest assets.
+        """
+        font = pygame.font.SysFont("Arial", 24)
+        images = list(dict.fromkeys([*find_images(self.settings.asset_dir), *self.settings.preload_images,
+                                     self.settings.background_image]))
+        sounds = list(self.settings.sound_effects.values()) if pygame.mixer.get_init() else []
+
+        def progress(loaded, total, path):
+            pygame.event.pump()
+            width, height = self.settings.screen_width, self.settings.screen_height
+            bar = pygame.Rect(width // 4, height // 2, width // 2, 24)
+            self.screen.fill((0, 0, 0))
+            pygame.draw.rect(self.screen, (255, 255, 255), bar, 2)
+            pygame.draw.rect(self.screen, (255, 255, 255), (bar.x, bar.y, bar.width * loaded // total, bar.height))
+            text = font.render(f"Loading {loaded}/{total}: {path}", True, (255, 255, 255))
+            self.screen.blit(text, (bar.x, bar.bottom + 10))
+            pygame.display.flip()
+
+        elapsed = self.assets.load_parallel(images, sounds, self.settings.loader_threads, progress)
+        slowest = sorted(self.assets.load_times.items(), key=lambda item: -item[1])[:5]
+        print(f"Loaded {len(self.assets.load_times)} assets in {elapsed * 1000:.0f} ms on "
+              f"{self.settings.loader_threads} threads; slowest: " +
+              ', '.join(f"{path} {seconds * 1000:.1f} ms" for path, seconds in slowest))
+
+    def command(self, *command):
+        """
+        Apply a player command and record it with the current simulation tick.
+        Commands are ignored while a replay is playing.
+        Args:
+            command: Command name and arguments, as taken by replay.apply_command.
+        """
+        if self.replay:
+            return
+        self.recorder.record(self.sim_clock.ticks, command)
+        apply_command(self, command)
+
+    def save_recording(self):
+        """
+        Finish the recording of the game, unless it is finished already, and save it.
+        """
+        if not self.recorder:
+            return
+        if not self.recorder.final:
+            self.recorder.finish(self)
+        if self.settings.replay_file:
+            self.recorder.save(self.settings.replay_file)
+            print(f"Replay saved to {self.settings.replay_file}.")
+
     def is_position_inside(self, pos):
         """Check if a given position is inside the game screen boundaries."""
         return 0 <= pos.x <= self.settings.screen_width and 0 <= pos.y <= self.settings.screen_height
@@ -48,64 +152,110 @@ class TowerDefenseGame:
         """
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                print(f"Assets: {self.assets.stats()}")
+                print(f"Text cache: {self.text.stats()}")
+                print(f"Pools: {self.level.pool_stats()}")
+                print(f"Sounds: {self.sounds.stats()}")
+                self.save_recording()
                 pygame.quit()
                 sys.exit()
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_1:
-                    self.selected_tower_type = 'basic'
+                    self.command('select', 'basic')
                     print("Selected basic tower.")
                 elif event.key == pygame.K_2:
-                    self.selected_tower_type = 'sniper'
+                    self.command('select', 'sniper')
                     print("Selected sniper tower.")
                 elif event.key == pygame.K_3:
-                    self.selected_tower_type = 'freezer'
+                    self.command('select', 'freezer')
                     print("Selected freezing tower.")
                 elif event.key == pygame.K_SPACE:
                     self.hide_tower_positions()
+                elif event.key == pygame.K_F2:
+                    self.renderer.toggle()
+                elif event.key == pygame.K_F3:
+                    self.renderer.toggle_debug()
+                elif event.key == pygame.K_F4:
+                    self.profiler.toggle()
+                elif event.key == pygame.K_F5:
+                    self.export_profile()
+                elif event.key == pygame.K_t:
+                    tower = self.grid.tower_at(pygame.mouse.get_pos())
+                    if tower:
+                        self.command('target', int(tower.position.x), int(tower.position.y))
             elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 mouse_pos = pygame.mouse.get_pos()
-                for tower in self.level.towers:
-                    if tower.upgrade_arrow_rect and tower.upgrade_arrow_rect.collidepoint(mouse_pos):
-                        tower.upgrade(tower)
-                        break
+                # An upgrade arrow lies within half a cell of its tower's center plus the arrow offset.
+                offset_x, offset_y = Tower.upgrade_arrow_offset
+                tower = self.grid.tower_at((mouse_pos[0] - offset_x, mouse_pos[1] - offset_y))
+                if tower and tower.upgrade_arrow_rect and tower.upgrade_arrow_rect.collidepoint(mouse_pos):
+                    self.command('upgrade', int(tower.position.x), int(tower.position.y))
             elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 3:
                 mouse_pos = pygame.mouse.get_pos()
-                if self.selected_tower_type:
-                    self.level.attempt_place_tower(mouse_pos, self.selected_tower_type)
-                else:
-                    print("No tower type selected.")
+                self.command('place', *mouse_pos)
 
     def _update_game(self):
         """
-           Update the state of the game.
+           Advance the state of the game by one simulation tick.
            This method updates the level and grid, including enemy movements,
-           bullet interactions, and tower states.
+           bullet interactions, and tower states, and starts the next wave
+           once the field is clear. When a replay is playing, its commands are
+           applied first. The recording is saved once the game is won or lost.
            """
+        if self.replay:
+            self.replay.apply_due(self)
+        self.sim_clock.advance()
         self.level.update()
         self.grid.update()
 
+        if len(self.level.enemies) == 0 and not self.level.all_waves_complete:
+            self.level.start_next_wave()
+
+        finished = self.is_game_over or self.level.all_waves_complete
+        if self.recorder and finished and not self.recorder.final:
+            self.save_recording()
+        if self.replay and self.sim_clock.ticks == self.replay.end_tick:
+            report(self.replay, self)
+
+    def export_profile(self):
+        """
+        Write the frames recorded by the profiler as a Chrome trace and as CSV.
+        """
+        if not self.profiler.frames:
+            print("No profiled frames to export.")
+            return
+        self.profiler.export_chrome_trace(self.settings.profile_trace_file)
+        self.profiler.export_csv(self.settings.profile_csv_file)
+        print(f"Profile of {len(self.profiler.frames)} frames saved to {self.settings.profile_trace_file} "
+              f"and {self.settings.profile_csv_file}.")
+
     def _draw_win_screen(self):
         """
         Display the win screen.
         Renders a message indicating that the player has won the game.
+        Returns:
+            pygame.Rect: Screen region drawn on.
         """
         win_text = "You Win!"
-        win_render = self.font.render(win_text, True, (255, 215, 0))
+        win_render = self.text.render(self.font, win_text, (255, 215, 0))
         win_rect = win_render.get_rect(center=(self.settings.screen_width/2, self.settings.screen_height/2))
-        self.screen.blit(win_render, win_rect)
+        return self.screen.blit(win_render, win_rect)
 
     def _draw_game_over_screen(self):
         """
         Display the game-over screen.
         Renders a message indicating that the player has lost the game.
+        Returns:
+            pygame.Rect: Screen region drawn on.
         """
         self.screen.fill((0, 0, 0))
 
         game_over_text = "Game Over!"
-        game_over_render = self.font.render(game_over_text, True, (255, 0, 0))
+        game_over_render = self.text.render(self.font, game_over_text, (255, 0, 0))
         game_over_rect = game_over_render.get_rect(center=(self.settings.screen_width / 2, self.settings.screen_height / 2))
 
         self.screen.blit(game_over_render, game_over_rect)
+        return self.screen.get_rect()
 
     def hide_tower_positions(self):
         """
@@ -113,63 +263,96 @@ class TowerDefenseGame:
         When called, this method hides or shows the positions where towers can be placed.
         """
         if self.hide_towers:
-            self.settings.tower_positions = []
             self.hide_towers = 0
             print("Tower positions are hidden.")
         else:
-            self.settings.tower_positions = [(x * self.settings.grid_size[0] + self.settings.grid_size[0] // 2, y * self.settings.grid_size[1] + self.settings.grid_size[1] // 2)
-                                 for x in range(1, self.settings.cols) for y in range(3, self.settings.rows)]
             self.hide_towers = 1
             print("Tower positions are shown.")
 
-    def _draw(self):
+    def _draw_static(self, surface):
+        """
+        Draw the parts of the scene that only change with the tower layout.
+        Args:
+            surface (pygame.Surface): Surface to draw on.
+        """
+        surface.blit(self.background, (0, 0))
+        self.level.draw_path(surface)
+        if self.hide_towers:
+            self.grid.draw(surface)
+
+    def _draw(self, alpha=1.0):
         """
         Render the game screen.
         This method draws the game elements, including the background, towers, grid,
         and game information like money, selected tower, and remaining waves or enemies.
+        The static scene is cached by the renderer, which only pushes the regions
+        drawn over it when dirty rectangles are enabled.
+        Args:
+            alpha (float, optional): Fraction of a tick elapsed since the last update, used
+                to interpolate moving sprites. Defaults to 1.0.
         """
+        self.renderer.begin_frame((self.level.layout_version, self.hide_towers))
         if self.is_game_over:
-            self._draw_game_over_screen()
+            rects = [self._draw_game_over_screen()]
         else:
-            self.screen.blit(self.background, (0, 0))
-            self.level.draw(self.screen)
-            if self.hide_towers:
-                self.grid.draw()
-            else:
-                pass
-            money_text = self.font.render(f"Money: ${self.settings.starting_money}", True, (255, 255, 255))
-            tower_text = self.font.render(
-                f"Selected Tower: {self.selected_tower_type if self.selected_tower_type else 'None'}", True,
-                (255, 255, 255))
-            waves_text = self.font.render(f"Waves Left: {len(self.level.waves) - self.level.current_wave}", True,
-                                          (255, 255, 255))
-            enemies_text = self.font.render(f"Enemies Left: {len(self.level.enemies)}", True, (255, 255, 255))
-
-            self.screen.blit(money_text, (10, 10))
-            self.screen.blit(tower_text, (10, 40))
-            self.screen.blit(waves_text, (10, 70))
-            self.screen.blit(enemies_text, (10, 100))
+            rects = self.level.draw(self.screen, alpha)
+            values = (
+                self.settings.starting_money,
+                self.selected_tower_type if self.selected_tower_type else 'None',
+                self.level.waves_left if self.level.waves_left is not None else 'Endless',
+                len(self.level.enemies),
+            )
+            for widget, value in zip(self.hud, values):
+                rects.append(widget.draw(self.screen, value))
+            if self.profiler.enabled:
+                rects.extend(self.profiler.draw_overlay(self.screen, self.text, self.font))
 
             if self.level.all_waves_complete:
-                self._draw_win_screen()
-        pygame.display.flip()
+                rects.append(self._draw_win_screen())
+        self.renderer.present(rects)
 
     def run_game(self):
         """
         Run the main game loop.
-        Continuously processes events, updates the game state, and renders the screen.
+        Processes events, then runs as many fixed simulation ticks as the elapsed
+        real time allows, and renders the screen with sprites interpolated between
+        the last two ticks. The simulation does not depend on the frame rate.
         """
+        # Elapsed time is accumulated in units of 1/fps ms so that the tick boundary stays exact.
+        tick_length = 1000
+        accumulator = 0
+        profiler = self.profiler
         while True:
-            self._check_events()
-            self._update_game()
+            profiler.begin_frame()
+            self.sounds.begin_frame()
+            with profiler.zone('events'):
+                self._check_events()
 
-            if len(self.level.enemies) == 0 and not self.level.all_waves_complete:
-                self.level.start_next_wave()
+            accumulator += self.clock.tick(self.settings.max_render_fps) * self.settings.fps
+            steps = 0
+            with profiler.zone('update'):
+                while accumulator >= tick_length and steps < self.settings.max_ticks_per_frame:
+                    self._update_game()
+                    accumulator -= tick_length
+                    steps += 1
+            if steps == self.settings.max_ticks_per_frame:
+                accumulator %= tick_length
 
-            self._draw()
-            self.clock.tick(60)
+            with profiler.zone('draw'):
+                self._draw(accumulator / tick_length)
+            profiler.end_frame({'ticks': steps, 'enemies': len(self.level.enemies),
+                                'bullets': len(self.level.bullets), 'towers': len(self.level.towers)})
 
 
 if __name__ == '__main__':
-    td_game = TowerDefenseGame()
+    parser = argparse.ArgumentParser(description="Play the Tower Defense Game.")
+    parser.add_argument('--seed', type=int, default=None, help="seed for the wave composition")
+    parser.add_argument('--profile', action='store_true', help="start with the frame profiler enabled")
+    parser.add_argument('--endless', action='store_true', help="keep sending waves of rising difficulty")
+    parser.add_argument('--map', help="map source file to play on")
+    parser.add_argument('--analytic-bullets', action='store_true',
+                        help="schedule hits at the computed impact tick instead of testing collisions")
+    args = parser.parse_args()
+    td_game = TowerDefenseGame(seed=args.seed, profile=args.profile, endless=args.endless, map_file=args.map,
+                               analytic_bullets=args.analytic_bullets)
     td_game.run_game()
@@ -0,0 +1,294 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from balance import simulate
+from tower import TOWER_CLASSES
+
+
+class LayoutOptimizer:
+    """
+    Searches tower layouts that hold off the waves best within a budget.
+    A layout is a set of (type, col, row, upgrades) towers. Cells are pruned
+    up front with the path coverage tables of the compiled map: every tower
+    type only considers the cells whose range reaches the most path length.
+    The search starts from the best-covering cells and climbs from there by
+    moving, retyping and upgrading single towers, restarting from a random
+    layout when no neighbour improves. Every candidate is scored by headless
+    games over a fixed set of seeds, played in parallel, and every score is
+    cached by layout so no layout is simulated twice.
+    """
+    def __init__(self, settings, towers, budget=None, seeds=(0, 1, 2), candidates=12, max_upgrades=1,
+                 max_ticks=60 * 60 * 15, leak_penalty=5, win_bonus=50, money_weight=0.01, workers=None,
+                 rng_seed=0):
+        """
+        Initialize the optimizer.
+        Args:
+            settings (Settings): Settings of the game, with the map to place towers on.
+            towers (int): Number of towers in a layout.
+            budget (int, optional): Money available for towers and upgrades. Defaults to the starting money.
+            seeds (tuple, optional): Seeds of the games each layout is scored on. Defaults to (0, 1, 2).
+            candidates (int, optional): Number of best-covering cells kept for each tower type. Defaults to 12.
+            max_upgrades (int, optional): Maximum number of upgrades of a tower. Defaults to 1.
+            max_ticks (int, optional): Ticks after which a scoring game is stopped. Defaults to 15 minutes.
+            leak_penalty (float, optional): Score lost for every leaked enemy. Defaults to 5.
+            win_bonus (float, optional): Score gained for winning a game. Defaults to 50.
+            money_weight (float, optional): Score gained for every unit of money left at the end,
+                which favours cheaper layouts among equally strong ones. Defaults to 0.01.
+            workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+            rng_seed (int, optional): Seed of the search's random moves. Defaults to 0.
+        Attributes:
+            candidates (dict): For every tower type, the (col, row) cells it may be placed on,
+                best coverage first.
+            scores (dict): Evaluation of every layout simulated so far, by layout.
+            cache_hits (int): Number of evaluations answered from the cache.
+        """
+        self.settings = settings
+        self.towers = towers
+        self.budget = budget if budget is not None else settings.starting_money
+        self.seeds = tuple(seeds)
+        self.max_upgrades = max_upgrades
+        self.max_ticks = max_ticks
+        self.leak_penalty = leak_penalty
+        self.win_bonus = win_bonus
+        self.money_weight = money_weight
+        self.workers = workers
+        self.rng = random.Random(rng_seed)
+        self.candidates = {name: self._rank_cells(tower_class.base_range)[:candidates]
+                           for name, tower_class in TOWER_CLASSES.items()}
+        self.scores = {}
+        self.cache_hits = 0
+        self._executor = None
+
+    def _rank_cells(self, tower_range):
+        """
+        Return the buildable cells that reach some path, by decreasing covered path length.
+        """
+        game_map = self.settings.map
+        ranges = np.asarray(game_map.coverage_ranges, dtype=float)
+        covered = np.asarray(game_map.coverage_length)[:, :, int(np.abs(ranges - tower_range).argmin())].sum(axis=-1)
+        cells = [tuple(cell) for cell in np.argwhere(game_map.buildable & (covered > 0)).tolist()]
+        return sorted(cells, key=lambda cell: -covered[cell])
+
+    def cost(self, layout):
+        """
+        Return the money needed to build and upgrade every tower of a layout.
+        """
+        return sum(self.settings.tower_cost + TOWER_CLASSES[name].upgrades_cost(self.settings, upgrades)
+                   for name, _, _, upgrades in layout)
+
+    def to_towers(self, layout):
+        """
+        Convert a layout to the tower list taken by HeadlessGame and the --layout files.
+        """
+        width, height = self.settings.grid_size
+        return [{'type': name, 'pos': (col * width + width // 2, row * height + height // 2), 'upgrades': upgrades}
+                for name, col, row, upgrades in layout]
+
+    def _valid(self, layout):
+        cells = [(col, row) for _, col, row, _ in layout]
+        return len(set(cells)) == len(cells) and self.cost(layout) <= self.budget
+
+    def initial_layout(self):
+        """
+        Return the layout placing the tower types in turn on their best-covering free cells,
+        dropping the last towers placed until it fits the budget.
+        """
+        names = list(self.candidates)
+        layout, used = [], set()
+        for index in range(self.towers):
+            name = names[index % len(names)]
+            cell = next((cell for cell in self.candidates[name] if cell not in used), None)
+            if cell is None:
+                continue
+            used.add(cell)
+            layout.append((name, *cell, 0))
+        while layout and self.cost(layout) > self.budget:
+            layout.pop()
+        return tuple(sorted(layout))
+
+    def random_layout(self):
+        """
+        Return a random valid layout over the candidate cells, or None if none was found.
+        """
+        for _ in range(100):
+            layout, used = [], set()
+            for _ in range(self.towers):
+                name = self.rng.choice(list(self.candidates))
+                free = [cell for cell in self.candidates[name] if cell not in used]
+                if not free:
+                    continue
+                cell = self.rng.choice(free)
+                used.add(cell)
+                layout.append((name, *cell, self.rng.randint(0, self.max_upgrades)))
+            layout = tuple(sorted(layout))
+            if self._valid(layout):
+                return layout
+        return None
+
+    def neighbours(self, layout, count):
+        """
+        Return up to `count` distinct valid layouts differing from a layout by one tower.
+        A tower moves to another candidate cell, changes type, or gains or loses an upgrade.
+        """
+        found = set()
+        if not layout:
+            return []
+        for _ in range(count * 20):
+            if len(found) >= count:
+                break
+            towers = list(layout)
+            index = self.rng.randrange(len(towers))
+            name, col, row, upgrades = towers[index]
+            move = self.rng.choice(('move', 'type', 'upgrade'))
+            if move == 'move':
+                col, row = self.rng.choice(self.candidates[name])
+            elif move == 'type':
+                name = self.rng.choice([other for other in self.candidates if other != name])
+            else:
+                upgrades = min(max(upgrades + self.rng.choice((-1, 1)), 0), self.max_upgrades)
+            towers[index] = (name, col, row, upgrades)
+            candidate = tuple(sorted(towers))
+            if candidate != layout and self._valid(candidate):
+                found.add(candidate)
+        return sorted(found)
+
+    def evaluate(self, layouts, deadline=None):
+        """
+        Score layouts, simulating only those not scored before.
+        Args:
+            layouts (list): Layouts to score.
+            deadline (float, optional): time.perf_counter() value after which no other layout is
+                simulated. Defaults to None, scoring every layout.
+        Returns:
+            list: Evaluation of every layout, as dicts with 'score', 'win_rate', 'leaks', 'kills' and 'money',
+                or None for the layouts left unscored at the deadline.
+                Layouts that could not be built in full score minus infinity.
+        """
+        pending = [layout for layout in dict.fromkeys(layouts) if layout not in self.scores]
+        self.cache_hits += len(layouts) - len(pending)
+        overrides = {'starting_money': self.budget, 'map_file': self.settings.map_file}
+        jobs = [[{'seed': seed, 'layout': self.to_towers(layout), 'strategy': None,
+                  'overrides': overrides, 'max_ticks': self.max_ticks} for seed in self.seeds]
+                for layout in pending]
+        if self._executor:
+            futures = [[self._executor.submit(simulate, job) for job in layout_jobs] for layout_jobs in jobs]
+        for index, layout in enumerate(pending):
+            if deadline is not None and time.perf_counter() >= deadline:
+                if self._executor:
+                    for future in sum(futures[index:], []):
+                        future.cancel()
+                break
+            if self._executor:
+                games = [future.result() for future in futures[index]]
+            else:
+                games = [simulate(job) for job in jobs[index]]
+            win_rate = sum(game['won'] for game in games) / len(games)
+            leaks = statistics.fmean(game['leaks'] for game in games)
+            kills = statistics.fmean(game['kills'] for game in games)
+            money = statistics.fmean(game['money'] for game in games)
+            score = kills - self.leak_penalty * leaks + self.win_bonus * win_rate + self.money_weight * money
+            if any(game['towers'] < len(layout) for game in games):
+                score = float('-inf')
+            self.scores[layout] = {
+                'score': score,
+                'win_rate': win_rate,
+                'leaks': leaks,
+                'kills': kills,
+                'money': money,
+            }
+        return [self.scores.get(layout) for layout in layouts]
+
+    def search(self, time_budget, top=5, patience=3):
+        """
+        Search layouts until the time budget is spent.
+        Args:
+            time_budget (float): Seconds to search for. At least the starting layout is scored.
+            top (int, optional): Number of best layouts returned. Defaults to 5.
+            patience (int, optional): Rounds without improvement before a random restart. Defaults to 3.
+        Returns:
+            list: (layout, evaluation) of the best layouts, best first.
+        """
+        deadline = time.perf_counter() + time_budget
+        workers = self.workers or 1
+        if workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            current = self.initial_layout()
+            current_score = self.evaluate([current])[0]['score']
+            stale = 0
+            while time.perf_counter() < deadline:
+                batch = self.neighbours(current, workers)
+                if not batch:
+                    stale = patience
+                else:
+                    evaluations = [(layout, evaluation) for layout, evaluation
+                                   in zip(batch, self.evaluate(batch, deadline)) if evaluation]
+                    if not evaluations:
+                        break
+                    layout, evaluation = max(evaluations, key=lambda item: item[1]['score'])
+                    if evaluation['score'] > current_score:
+                        current, current_score = layout, evaluation['score']
+                        stale = 0
+                    else:
+                        stale += 1
+                if stale >= patience:
+                    restart = self.random_layout()
+                    if restart is None:
+                        break
+                    evaluation = self.evaluate([restart], deadline)[0]
+                    if evaluation is None:
+                        break
+                    current, current_score = restart, evaluation['score']
+                    stale = 0
+        finally:
+            if self._executor:
+                self._executor.shutdown()
+                self._executor = None
+        ranked = sorted(((layout, evaluation) for layout, evaluation in self.scores.items()
+                         if evaluation['score'] != float('-inf')), key=lambda item: -item[1]['score'])
+        return ranked[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search the best tower layouts for a map within a budget.")
+    parser.add_argument('--towers', type=int, default=5, help="number of towers in a layout")
+    parser.add_argument('--budget', type=int, default=None, help="money for towers and upgrades")
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0, 1, 2], help="seeds every layout is played on")
+    parser.add_argument('--candidates', type=int, default=12, help="best-covering cells kept per tower type")
+    parser.add_argument('--max-upgrades', type=int, default=1, help="maximum upgrades per tower")
+    parser.add_argument('--time', type=float, default=60, help="seconds to search for")
+    parser.add_argument('--top', type=int, default=5, help="number of layouts to print")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes, the number of CPUs by default")
+    parser.add_argument('--map', help="map source file to place towers on")
+    parser.add_argument('--output', help="file the best layout is written to, for headless.py --layout")
+    args = parser.parse_args(argv)
+
+    from settings import Settings
+    settings = Settings()
+    if args.map:
+        settings.load_map(args.map)
+    optimizer = LayoutOptimizer(settings, args.towers, args.budget, args.seeds, args.candidates, args.max_upgrades,
+                                workers=args.workers or os.cpu_count())
+    start = time.perf_counter()
+    ranked = optimizer.search(args.time, args.top)
+    print(f"{len(optimizer.scores)} layouts simulated, {optimizer.cache_hits} cache hits, "
+          f"{time.perf_counter() - start:.1f}s")
+    print(f"{'Score':>7} {'Win %':>6} {'Leaks':>6} {'Cost':>5}  Towers")
+    for layout, evaluation in ranked:
+        towers = ' '.join(f"{tower['type']}:{tower['pos'][0]},{tower['pos'][1]}:{tower['upgrades']}"
+                          for tower in optimizer.to_towers(layout))
+        print(f"{evaluation['score']:>7.1f} {evaluation['win_rate'] * 100:>6.1f} {evaluation['leaks']:>6.2f} "
+              f"{optimizer.cost(layout):>5}  {towers}")
+    if args.output and ranked:
+        with open(args.output, 'w') as file:
+            json.dump(optimizer.to_towers(ranked[0][0]), file, indent=2)
+        print(f"Best layout written to {args.output}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+import math
+from bisect import bisect_right
+import numpy as np
+
+
+def circle_interval(start, direction, length, center, radius):
+    """
+    Return the part of a segment that lies within a circle.
+    Args:
+        start (tuple): Start point of the segment.
+        direction (tuple): Unit direction of the segment.
+        length (float): Length of the segment.
+        center (tuple): Center of the circle.
+        radius (float): Radius of the circle.
+    Returns:
+        tuple: (from, to, closest) distances along the segment, closest being the point
+            nearest to the center, or None if the circle misses the segment.
+    """
+    cx, cy = center[0] - start[0], center[1] - start[1]
+    projection = cx * direction[0] + cy * direction[1]
+    offset = cx * cx + cy * cy - projection * projection
+    if offset > radius * radius:
+        return None
+    half = math.sqrt(radius * radius - offset)
+    low, high = max(projection - half, 0), min(projection + half, length)
+    if low > high:
+        return None
+    return float(low), float(high), float(min(max(projection, low), high))
+
+
+class CompiledPath:
+    """
+    An enemy path compiled into segment tables with arc-length parametrization.
+    A point on the path is identified by its distance from the start, so an
+    enemy's progress is a single number and its position is found with a
+    binary search over the cumulative segment lengths.
+    """
+    def __init__(self, points):
+        """
+        Compile a path.
+        Args:
+            points (list): The (x, y) points of the path.
+        Attributes:
+            points (ndarray): The points of the path.
+            directions (ndarray): Unit direction of every segment.
+            lengths (ndarray): Length of every segment.
+            cumulative (ndarray): Distance from the start of the path to the start of every
+                segment, followed by the total length.
+            length (float): Total length of the path.
+        """
+        self.points = np.asarray(points, dtype=float)
+        delta = np.diff(self.points, axis=0)
+        self.lengths = np.hypot(delta[:, 0], delta[:, 1])
+        self.directions = delta / self.lengths[:, None]
+        self.cumulative = np.concatenate([[0.0], np.cumsum(self.lengths)])
+        self.length = float(self.cumulative[-1])
+        self._starts = self.cumulative[:-1].tolist()
+
+    @classmethod
+    def from_tables(cls, points, lengths, directions, cumulative):
+        """
+        Create a compiled path from its precomputed tables, e.g. those of a compiled map.
+        Args:
+            points (ndarray): The points of the path.
+            lengths (ndarray): Length of every segment.
+            directions (ndarray): Unit direction of every segment.
+            cumulative (ndarray): Distance from the start to every segment, followed by the total length.
+        Returns:
+            CompiledPath: The path, sharing the given arrays.
+        """
+        path = cls.__new__(cls)
+        path.points = points
+        path.lengths = lengths
+        path.directions = directions
+        path.cumulative = cumulative
+        path.length = float(cumulative[-1])
+        path._starts = cumulative[:-1].tolist()
+        return path
+
+    def segment_at(self, distance):
+        """
+        Return the index of the segment containing a distance along the path.
+        Distances before the start or past the end fall on the first or last segment.
+        """
+        return min(max(bisect_right(self._starts, distance) - 1, 0), len(self._starts) - 1)
+
+    def coverage(self, center, radius):
+        """
+        Return the parts of the path within a circle, one per segment it crosses.
+        Args:
+            center (tuple): Center of the circle.
+            radius (float): Radius of the circle.
+        Returns:
+            list: (from, to, closest) distances along the path, closest being the point of
+                the segment nearest to the center.
+        """
+        covered = []
+        for segment, (start, direction, length) in enumerate(zip(self.points, self.directions, self.lengths)):
+            interval = circle_interval(start, direction, length, center, radius)
+            if interval:
+                offset = self._starts[segment]
+                covered.append(tuple(offset + value for value in interval))
+        return covered
+
+    def position_at(self, distance):
+        """
+        Return the point at a distance along the path.
+        Args:
+            distance (float): Distance from the start of the path.
+        Returns:
+            tuple: The (x, y) position.
+        """
+        segment = self.segment_at(distance)
+        x, y = self.points[segment] + self.directions[segment] * (distance - self._starts[segment])
+        return float(x), float(y)
+
+
+class PathTable:
+    """
+    All compiled paths of a level laid end to end for vectorized lookups.
+    A point on path p at distance d has the key base[p] + d. Paths are separated
+    by a gap, so sorting keys orders points first by path and then by distance.
+    """
+    gap = 1.0
+
+    def __init__(self, paths=(), compiled=()):
+        """
+        Initialize the path table.
+        Args:
+            paths (list, optional): Paths to register right away. Defaults to ().
+            compiled (list, optional): Already compiled forms of those paths, so they are not
+                compiled again. Defaults to ().
+        Attributes:
+            paths (list): Registered paths, indexed by path id.
+            compiled (list): CompiledPath of every registered path.
+            base (ndarray): Key of the start of every path.
+            lengths (ndarray): Total length of every path.
+            segment_key (ndarray): Key of the start of every segment of every path.
+        """
+        self.paths = []
+        self.ids = {}
+        self.compiled = []
+        self.base = np.zeros(0)
+        self.lengths = np.zeros(0)
+        self.first_segment = np.zeros(0, dtype=np.int64)
+        self.last_segment = np.zeros(0, dtype=np.int64)
+        self.segment_key = np.zeros(0)
+        self.segment_start = np.zeros((0, 2))
+        self.segment_direction = np.zeros((0, 2))
+        compiled = list(compiled)
+        for index, path in enumerate(paths):
+            self.register(path, compiled[index] if index < len(compiled) else None)
+
+    def register(self, path, compiled=None):
+        """
+        Compile a path and add it to the table, unless it is already registered.
+        Args:
+            path (list): The (x, y) points of the path.
+            compiled (CompiledPath, optional): Compiled form of the path. Defaults to compiling it.
+        Returns:
+            int: Id of the path.
+        """
+        key = id(path)
+        if key in self.ids:
+            return self.ids[key]
+        compiled = compiled or CompiledPath(path)
+        base = self.base[-1] + self.lengths[-1] + self.gap if len(self.paths) else 0.0
+        self.ids[key] = len(self.paths)
+        self.paths.append(path)
+        self.compiled.append(compiled)
+        self.base = np.append(self.base, base)
+        self.lengths = np.append(self.lengths, compiled.length)
+        self.first_segment = np.append(self.first_segment, len(self.segment_key))
+        self.last_segment = np.append(self.last_segment, len(self.segment_key) + len(compiled.lengths) - 1)
+        self.segment_key = np.concatenate([self.segment_key, base + compiled.cumulative[:-1]])
+        self.segment_start = np.concatenate([self.segment_start, compiled.points[:-1]])
+        self.segment_direction = np.concatenate([self.segment_direction, compiled.directions])
+        return self.ids[key]
+
+    def get(self, path):
+        """
+        Return the compiled form of a path, registering it if needed.
+        """
+        return self.compiled[self.register(path)]
+
+    def positions(self, path_ids, distances):
+        """
+        Return the points at the given distances along the given paths.
+        Args:
+            path_ids (ndarray): Path id of every point.
+            distances (ndarray): Distance of every point from the start of its path.
+        Returns:
+            ndarray: (n, 2) array of positions.
+        """
+        keys = self.base[path_ids] + distances
+        segments = np.searchsorted(self.segment_key, keys, side='right') - 1
+        segments = np.clip(segments, self.first_segment[path_ids], self.last_segment[path_ids])
+        along = keys - self.segment_key[segments]
+        return self.segment_start[segments] + self.segment_direction[segments] * along[:, None]
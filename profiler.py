@@ -0,0 +1,224 @@
+import csv
+import json
+import os
+import time
+from collections import deque
+
+
+class _Zone:
+    """
+    Context manager timing one zone of a frame.
+    """
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler.levels.setdefault(self.name, self.profiler.depth)
+        self.profiler.depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        profiler = self.profiler
+        profiler.depth -= 1
+        profiler.zones.append((self.name, self.start, end - self.start, profiler.depth))
+        return False
+
+
+class _NullZone:
+    """
+    Context manager doing nothing, returned while the profiler is disabled.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_ZONE = _NullZone()
+
+
+class FrameProfiler:
+    """
+    Measures how long each phase of a frame takes.
+    Code wraps its phases in `with profiler.zone(name):` blocks. While the
+    profiler is disabled a zone is a shared no-op object, so instrumentation
+    costs next to nothing. While enabled, every zone's start and duration are
+    kept per frame, for the rolling averages of the on-screen overlay and for
+    export as a Chrome trace or a CSV file.
+    """
+    def __init__(self, enabled=False, history=120, max_frames=3600):
+        """
+        Initialize the profiler.
+        Args:
+            enabled (bool, optional): Whether zones are timed. Defaults to False.
+            history (int, optional): Number of frames averaged by the overlay. Defaults to 120.
+            max_frames (int, optional): Number of most recent frames kept for export. Defaults to 3600.
+        Attributes:
+            frames (deque): Recorded frames as dicts with their index, start, duration,
+                zones and entity counts.
+            zones (list): (name, start, duration, depth) of the zones of the current frame.
+            depth (int): Nesting depth of the zone being timed.
+            totals (dict): Milliseconds spent in each zone over the last `history` frames.
+            levels (dict): Nesting depth of each zone name, in the order the zones were first entered.
+            counts (dict): Entity counts of the last recorded frame.
+        """
+        self.enabled = enabled
+        self.history = history
+        self.frames = deque(maxlen=max_frames)
+        self.recent = deque()
+        self.zones = []
+        self.depth = 0
+        self.frame_index = 0
+        self.frame_start = None
+        self.totals = {}
+        self.levels = {}
+        self.counts = {}
+
+    def zone(self, name):
+        """
+        Return a context manager timing a phase of the frame.
+        Args:
+            name (str): Name of the phase.
+        """
+        if not self.enabled:
+            return NULL_ZONE
+        return _Zone(self, name)
+
+    def toggle(self):
+        """
+        Start or stop timing zones.
+        """
+        self.enabled = not self.enabled
+        self.frame_start = None
+        print(f"Profiler {'enabled' if self.enabled else 'disabled'}.")
+
+    def begin_frame(self):
+        """
+        Mark the start of a frame.
+        """
+        if self.enabled:
+            self.zones = []
+            self.depth = 0
+            self.frame_start = time.perf_counter()
+
+    def end_frame(self, counts=None):
+        """
+        Mark the end of a frame and record its zones.
+        Args:
+            counts (dict, optional): Entity counts to show and export with the frame. Defaults to None.
+        """
+        if not self.enabled or self.frame_start is None:
+            return
+        end = time.perf_counter()
+        frame = {'index': self.frame_index, 'start': self.frame_start, 'duration': end - self.frame_start,
+                 'zones': self.zones, 'counts': counts or {}}
+        self.frame_index += 1
+        self.frames.append(frame)
+        self.counts = frame['counts']
+
+        milliseconds = self._frame_totals(frame)
+        self.recent.append(milliseconds)
+        for name, value in milliseconds.items():
+            self.totals[name] = self.totals.get(name, 0) + value
+        if len(self.recent) > self.history:
+            for name, value in self.recent.popleft().items():
+                self.totals[name] -= value
+        self.zones = []
+        self.frame_start = None
+
+    def _frame_totals(self, frame):
+        """
+        Return the milliseconds spent in each zone of a frame, including the whole frame.
+        """
+        milliseconds = {'frame': frame['duration'] * 1000}
+        for name, _, duration, _ in frame['zones']:
+            milliseconds[name] = milliseconds.get(name, 0) + duration * 1000
+        return milliseconds
+
+    def averages(self):
+        """
+        Return the rolling average milliseconds per frame of every zone.
+        Returns:
+            list: (name, depth, milliseconds) tuples, the whole frame first and then
+                the zones in the order they were first entered.
+        """
+        frames = len(self.recent)
+        if not frames:
+            return []
+        names = ['frame'] + list(self.levels)
+        return [(name, self.levels.get(name, -1) + 1, self.totals.get(name, 0) / frames) for name in names]
+
+    def draw_overlay(self, screen, text, font, position=(10, 140)):
+        """
+        Draw the rolling per-zone timings and the entity counts of the last frame.
+        Args:
+            screen: The game screen to draw on.
+            text (TextCache): Cache used to render the lines.
+            font (pygame.font.Font): Font to render with.
+            position (tuple, optional): Top-left corner of the overlay. Defaults to (10, 140).
+        Returns:
+            list: Screen regions drawn on.
+        """
+        x, y = position
+        lines = [f"{'  ' * depth}{name}: {milliseconds:.1f} ms" for name, depth, milliseconds in self.averages()]
+        lines += [f"{name}: {count}" for name, count in self.counts.items()]
+        rects = []
+        for line in lines:
+            surface = text.render(font, line, (255, 255, 0))
+            rects.append(screen.blit(surface, (x, y)))
+            y += surface.get_height()
+        return rects
+
+    def export_chrome_trace(self, path):
+        """
+        Write the recorded frames as Chrome trace events (chrome://tracing, Perfetto).
+        Args:
+            path (str): File path of the trace.
+        """
+        if not self.frames:
+            return
+        origin = self.frames[0]['start']
+        events = []
+        for frame in self.frames:
+            events.append({'name': 'frame', 'ph': 'X', 'pid': 0, 'tid': 0,
+                           'ts': (frame['start'] - origin) * 1e6, 'dur': frame['duration'] * 1e6,
+                           'args': {'index': frame['index'], **frame['counts']}})
+            events.extend({'name': name, 'ph': 'X', 'pid': 0, 'tid': 0,
+                           'ts': (start - origin) * 1e6, 'dur': duration * 1e6}
+                          for name, start, duration, _ in frame['zones'])
+        self._prepare(path)
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+    def export_csv(self, path):
+        """
+        Write one row per recorded frame with the milliseconds of every zone and the entity counts.
+        Args:
+            path (str): File path of the CSV file.
+        """
+        if not self.frames:
+            return
+        rows = [(frame, self._frame_totals(frame)) for frame in self.frames]
+        zone_names = ['frame'] + list(self.levels)
+        count_names = list(dict.fromkeys(name for frame, _ in rows for name in frame['counts']))
+        self._prepare(path)
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['index'] + [f"{name}_ms" for name in zone_names] + count_names)
+            for frame, milliseconds in rows:
+                writer.writerow([frame['index']] + [f"{milliseconds.get(name, 0):.4f}" for name in zone_names]
+                                + [frame['counts'].get(name, '') for name in count_names])
+
+    @staticmethod
+    def _prepare(path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
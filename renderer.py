@@ -0,0 +1,90 @@
+import pygame
+
+
+class DirtyRectRenderer:
+    """
+    Presents frames by pushing only the parts of the screen that changed.
+    The static scene (background, paths and tower spots) is drawn once into a
+    cached layer. Every frame, the regions covered by the previous frame's
+    sprites, health bars and text are restored from that layer, the moving
+    parts are drawn again, and only the old and new regions are sent to the
+    display. With dirty rectangles disabled, every frame is a full redraw and flip.
+    """
+    debug_color = (255, 0, 255)
+
+    def __init__(self, screen, draw_static, enabled=True, debug=False, full_redraw_ratio=0.5):
+        """
+        Initialize the renderer.
+        Args:
+            screen (pygame.Surface): The display surface.
+            draw_static (callable): Draws the static scene onto the surface it is given.
+            enabled (bool, optional): Whether to update dirty rectangles only. Defaults to True.
+            debug (bool, optional): Whether to outline the dirty regions. Defaults to False.
+            full_redraw_ratio (float, optional): Fraction of the screen above which a frame is
+                flipped whole instead of updated by rectangles. Defaults to 0.5.
+        Attributes:
+            static (pygame.Surface): Cached static scene.
+            static_key: Key of the layout the static scene was drawn for.
+            previous (list): Regions drawn in the previous frame, restored before the next one.
+            full (bool): True when the next frame must redraw and flip the whole screen.
+        """
+        self.screen = screen
+        self.draw_static = draw_static
+        self.enabled = enabled
+        self.debug = debug
+        self.full_redraw_ratio = full_redraw_ratio
+        self.static = screen.copy()
+        self.static_key = None
+        self.previous = []
+        self.full = True
+
+    def toggle(self):
+        """
+        Switch between dirty rectangle updates and full redraws.
+        """
+        self.enabled = not self.enabled
+        self.full = True
+        print(f"Dirty rectangles {'enabled' if self.enabled else 'disabled'}.")
+
+    def toggle_debug(self):
+        """
+        Show or hide the outlines of the dirty regions.
+        """
+        self.debug = not self.debug
+        print(f"Dirty rectangle overlay {'shown' if self.debug else 'hidden'}.")
+
+    def begin_frame(self, static_key):
+        """
+        Restore the screen to the static scene where the previous frame drew.
+        Args:
+            static_key: Key of the current static layout; the static scene is drawn
+                again when it differs from the cached one.
+        """
+        if static_key != self.static_key:
+            self.draw_static(self.static)
+            self.static_key = static_key
+            self.full = True
+        if self.full or not self.enabled:
+            self.screen.blit(self.static, (0, 0))
+        else:
+            self.screen.blits([(self.static, rect, rect) for rect in self.previous], doreturn=False)
+
+    def present(self, rects):
+        """
+        Push the frame to the display.
+        Args:
+            rects (list): Regions drawn over the static scene in this frame.
+        """
+        bounds = self.screen.get_rect()
+        rects = [clipped for clipped in (bounds.clip(rect) for rect in rects) if clipped.width and clipped.height]
+        if self.debug:
+            for rect in rects:
+                pygame.draw.rect(self.screen, self.debug_color, rect, 1)
+        dirty = self.previous + rects
+        area = sum(rect.width * rect.height for rect in dirty)
+        if self.full or not self.enabled or area > bounds.width * bounds.height * self.full_redraw_ratio:
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty)
+        self.previous = rects
+        self.full = False
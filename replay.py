@@ -0,0 +1,247 @@
+import argparse
+import json
+import os
+import time
+
+
+REPLAY_VERSION = 1
+
+
+def apply_command(game, command):
+    """
+    Apply a recorded player command to a game.
+    Commands are lists starting with their name:
+    ['select', tower_type], ['place', x, y], ['upgrade', x, y] and ['target', x, y],
+    which switches a tower to its next targeting policy.
+    Args:
+        game: The game to apply the command to (TowerDefenseGame or HeadlessGame).
+        command (list): The command.
+    """
+    name = command[0]
+    if name == 'select':
+        game.selected_tower_type = command[1]
+    elif name == 'place':
+        if game.selected_tower_type:
+            game.level.attempt_place_tower((command[1], command[2]), game.selected_tower_type)
+        else:
+            print("No tower type selected.")
+    elif name == 'upgrade':
+        tower = game.grid.tower_at((command[1], command[2]))
+        if tower:
+            tower.upgrade(tower)
+    elif name == 'target':
+        tower = game.grid.tower_at((command[1], command[2]))
+        if tower:
+            tower.cycle_targeting()
+            print(f"Tower targets the {tower.targeting} enemy.")
+    else:
+        raise ValueError(f"Unknown replay command '{name}'")
+
+
+def snapshot(game):
+    """
+    Return the simulation state compared at the end of a replay.
+    Args:
+        game: The game to inspect.
+    Returns:
+        dict: Tick, money, wave, kills, leaks, and every enemy as [path id, distance, health]
+            in spawn order.
+    """
+    manager = game.level.enemy_manager
+    order = sorted(range(manager.count), key=lambda slot: manager.serial[slot])
+    return {
+        'tick': game.sim_clock.ticks,
+        'money': game.settings.starting_money,
+        'wave': game.level.current_wave,
+        'kills': game.level.kills,
+        'leaks': game.level.leaks,
+        'enemies': [[int(manager.path_id[slot]), float(manager.distance[slot]), float(manager.health[slot])]
+                    for slot in order],
+    }
+
+
+class InputRecorder:
+    """
+    Records the seed and the player's commands of a game, tagged with their simulation tick.
+    Together with the starting money, this is all that is needed to play the
+    game again tick for tick, since the simulation is deterministic.
+    """
+    def __init__(self, seed, money, endless=False, map_file=None, analytic_bullets=False):
+        """
+        Initialize the recorder.
+        Args:
+            seed (int): Seed of the level's random generator.
+            money (int): Starting money of the game.
+            endless (bool, optional): Whether the game runs in endless mode. Defaults to False.
+            map_file (str, optional): Map source file of the game. Defaults to the default map.
+            analytic_bullets (bool, optional): Whether the game schedules hits at the computed impact tick.
+                Defaults to False.
+        Attributes:
+            commands (list): Recorded commands as [tick, name, *arguments].
+            final (dict): Snapshot of the game when the recording was finished, or None.
+        """
+        self.seed = seed
+        self.money = money
+        self.endless = endless
+        self.map_file = map_file
+        self.analytic_bullets = analytic_bullets
+        self.commands = []
+        self.final = None
+
+    def record(self, tick, command):
+        """
+        Add a command applied before simulation tick `tick` + 1.
+        Args:
+            tick (int): Number of ticks simulated when the command was applied.
+            command (list): The command, as taken by apply_command.
+        """
+        self.commands.append([tick, *command])
+
+    def finish(self, game):
+        """
+        End the recording and store the final state of the game.
+        """
+        self.final = snapshot(game)
+
+    def save(self, path):
+        """
+        Write the recording to a JSON file.
+        Args:
+            path (str): File path of the replay.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as file:
+            json.dump({'version': REPLAY_VERSION, 'seed': self.seed, 'money': self.money, 'endless': self.endless,
+                       'map': self.map_file, 'analytic_bullets': self.analytic_bullets, 'commands': self.commands,
+                       'final': self.final},
+                      file, separators=(',', ':'))
+
+
+class ReplayPlayer:
+    """
+    Plays a recorded game back by applying its commands at their ticks.
+    """
+    def __init__(self, recording):
+        """
+        Initialize the player.
+        Args:
+            recording (dict): Contents of a replay file.
+        Attributes:
+            seed (int): Seed of the level's random generator.
+            money (int): Starting money of the game.
+            endless (bool): Whether the game ran in endless mode.
+            map_file (str): Map source file of the game, or None for the default map.
+            analytic_bullets (bool): Whether the game scheduled hits at the computed impact tick.
+            commands (list): Commands as [tick, name, *arguments], in order.
+            final (dict): Recorded final state, or None if the recording was not finished.
+            next_command (int): Index of the next command to apply.
+        """
+        if recording.get('version') != REPLAY_VERSION:
+            raise ValueError(f"Unsupported replay version {recording.get('version')}")
+        self.seed = recording['seed']
+        self.money = recording['money']
+        self.endless = recording.get('endless', False)
+        self.map_file = recording.get('map')
+        self.analytic_bullets = recording.get('analytic_bullets', False)
+        self.commands = recording['commands']
+        self.final = recording['final']
+        self.next_command = 0
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a replay file.
+        Args:
+            path (str): File path of the replay.
+        Returns:
+            ReplayPlayer: The player for the recording.
+        """
+        with open(path) as file:
+            return cls(json.load(file))
+
+    @property
+    def end_tick(self):
+        """
+        int: Tick at which the recording ended, or None if it was not finished.
+        """
+        return self.final['tick'] if self.final else None
+
+    def apply_due(self, game):
+        """
+        Apply the commands recorded before the game's current tick.
+        Must be called before every simulation tick.
+        """
+        ticks = game.sim_clock.ticks
+        while self.next_command < len(self.commands) and self.commands[self.next_command][0] <= ticks:
+            apply_command(game, self.commands[self.next_command][1:])
+            self.next_command += 1
+
+    def verify(self, game):
+        """
+        Compare the state of a game with the recorded final state.
+        Returns:
+            list: Names of the fields that differ; empty when the replay matches.
+        """
+        if not self.final:
+            return []
+        state = snapshot(game)
+        return [name for name in self.final if state[name] != self.final[name]]
+
+    def run_headless(self, settings=None):
+        """
+        Play the recording without a display, as fast as possible.
+        Args:
+            settings (Settings, optional): Game settings to use. Defaults to new Settings.
+        Returns:
+            tuple: The finished HeadlessGame and the elapsed time in seconds.
+        """
+        from headless import HeadlessGame
+        game = HeadlessGame(seed=self.seed, money=self.money, settings=settings, endless=self.endless,
+                            map_file=self.map_file, analytic_bullets=self.analytic_bullets)
+        start = time.perf_counter()
+        while not (game.level.all_waves_complete or game.is_game_over):
+            if self.end_tick is not None and game.sim_clock.ticks >= self.end_tick:
+                break
+            self.apply_due(game)
+            game.step()
+        return game, time.perf_counter() - start
+
+
+def report(player, game):
+    """
+    Print whether a finished replay reproduced the recorded final state.
+    Returns:
+        bool: True if the replay matches or has no recorded final state.
+    """
+    mismatches = player.verify(game)
+    if not player.final:
+        print(f"Replay ended at tick {game.sim_clock.ticks}; the recording has no final state to compare.")
+    elif mismatches:
+        print(f"Replay diverged at tick {game.sim_clock.ticks}: {', '.join(mismatches)} differ.")
+    else:
+        print(f"Replay matched the recording at tick {game.sim_clock.ticks} "
+              f"(money {game.settings.starting_money}, wave {game.level.current_wave + 1}).")
+    return not mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play back a recorded Tower Defense game.")
+    parser.add_argument('replay', help="replay file written by the game")
+    parser.add_argument('--realtime', action='store_true', help="play at normal speed with rendering on")
+    args = parser.parse_args(argv)
+
+    player = ReplayPlayer.load(args.replay)
+    if args.realtime:
+        from main import TowerDefenseGame
+        TowerDefenseGame(replay=player).run_game()
+        return
+    game, elapsed = player.run_headless()
+    print(f"Played {game.sim_clock.ticks} ticks in {elapsed:.3f}s.")
+    if not report(player, game):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
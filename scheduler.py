@@ -0,0 +1,116 @@
+import heapq
+import numpy as np
+
+
+class TowerScheduler:
+    """
+    Wakes only the towers that can shoot instead of updating every tower every tick.
+    Towers on cooldown wait in a min-heap keyed by the game time their cooldown
+    ends. A tower whose cooldown is over but has no enemy in range is parked:
+    it is only looked at again once an enemy enters the path intervals it
+    covers. The intervals of all parked towers are kept in flat arrays, rebuilt
+    only when a tower is parked or woken, and tested against the enemies in
+    one pass per tick. Woken towers are updated in placement order, like
+    iterating over Level.towers, so games play out exactly as before.
+    """
+    def __init__(self, level):
+        """
+        Initialize the scheduler.
+        Args:
+            level: Reference to the level owning the towers.
+        Attributes:
+            heap (list): Towers on cooldown as (ready time, placement order, tower). An entry is
+                stale once the tower was rescheduled with another ready time.
+            ready_at (dict): Current ready time of every tower in the heap.
+            parked (dict): Towers off cooldown without an enemy in range, by placement order.
+            order (dict): Placement order of every scheduled tower.
+            woken (int): Number of tower updates run so far.
+        """
+        self.level = level
+        self.heap = []
+        self.ready_at = {}
+        self.parked = {}
+        self.order = {}
+        self.woken = 0
+        self._intervals = None
+
+    def __len__(self):
+        return len(self.order)
+
+    def _park(self, order, tower):
+        self.parked[order] = tower
+        self._intervals = None
+
+    def _unpark(self, order):
+        if self.parked.pop(order, None) is not None:
+            self._intervals = None
+
+    def _parked_intervals(self):
+        """
+        Return the start and end keys of the intervals covered by the parked towers,
+        and the placement order of the tower owning each, in placement order.
+        """
+        paths = len(self.level.paths.paths)
+        if self._intervals is None or self._intervals[0] != paths:
+            starts, ends, owners = [], [], []
+            for order in sorted(self.parked):
+                for start, end, _ in self.level.targeting.tower_intervals(self.parked[order]):
+                    starts.append(start)
+                    ends.append(end)
+                    owners.append(order)
+            self._intervals = (paths, np.array(starts, dtype=float), np.array(ends, dtype=float),
+                               np.array(owners, dtype=np.int64))
+        return self._intervals[1:]
+
+    def schedule(self, tower):
+        """
+        Add a tower, or reschedule it after its rate of fire or range changed.
+        Args:
+            tower (Tower): The placed or upgraded tower.
+        """
+        if tower not in self.order:
+            self.order[tower] = len(self.order)
+        self._unpark(self.order[tower])
+        ready = tower.last_shot_time + tower.rate_of_fire
+        self.ready_at[tower] = ready
+        heapq.heappush(self.heap, (ready, self.order[tower], tower))
+
+    def _pop_ready(self, current_time):
+        """
+        Move the towers whose cooldown is over from the heap to the parked towers.
+        """
+        early = []
+        while self.heap and self.heap[0][0] <= current_time:
+            ready, order, tower = heapq.heappop(self.heap)
+            if self.ready_at.get(tower) != ready:
+                continue
+            # Same test as Tower.update, which the rounding of the sum may not match.
+            if current_time - tower.last_shot_time > tower.rate_of_fire:
+                del self.ready_at[tower]
+                self._park(order, tower)
+            else:
+                early.append((ready, order, tower))
+        for entry in early:
+            heapq.heappush(self.heap, entry)
+
+    def update(self, current_time):
+        """
+        Update the towers that are off cooldown and have an enemy in range.
+        Args:
+            current_time (int): Current game time in milliseconds.
+        """
+        self._pop_ready(current_time)
+        if not self.parked:
+            return
+        starts, ends, owners = self._parked_intervals()
+        woken = owners[self.level.targeting.occupied(starts, ends)]
+        if not len(woken):
+            return
+        level = self.level
+        # Owners are in placement order, so the woken towers are too.
+        for order in dict.fromkeys(woken.tolist()):
+            tower = self.parked[order]
+            tower.update(current_time, level.bullets)
+            self.woken += 1
+            if tower.last_shot_time == current_time:
+                self.schedule(tower)
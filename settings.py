@@ -1,3 +1,6 @@
+from gamemap import GameMap
+
+
 class Settings:
     """
     Represents the settings for the Tower Defense Game.
@@ -7,15 +10,36 @@ class Settings:
     def __init__(self):
         """
         Initialize the game's settings.
+        The screen and grid size, enemy paths, buildable cells and background come from the map file.
         Attributes:
+            map_file (str): Map source file declaring the paths, buildable cells and background.
+            map_cache_dir (str): Directory the compiled maps are cached in.
+            map (GameMap): The compiled map, memory-mapped from its cache.
             screen_width (int): Width of the game screen in pixels.
             screen_height (int): Height of the game screen in pixels.
             bg_color (tuple): Background color of the screen (RGB format).
+            fps (int): Number of fixed simulation ticks per second.
+            max_render_fps (int): Upper limit of rendered frames per second.
+            max_ticks_per_frame (int): Maximum number of simulation ticks run before a frame is drawn;
+                time beyond that is dropped so a long hitch does not stall the game.
+            dirty_rects (bool): Whether frames update only the changed screen regions instead of
+                redrawing and flipping the whole screen. Toggled in game with F2.
+            show_dirty_rects (bool): Whether the updated regions are outlined. Toggled in game with F3.
+            full_redraw_ratio (float): Fraction of the screen above which a frame is flipped whole.
+            text_cache_size (int): Maximum number of rendered text surfaces kept in the text cache.
+            profiler_history (int): Number of frames averaged by the profiler overlay.
+            profiler_frames (int): Number of most recent frames the profiler keeps for export.
+            profile_trace_file (str): File the profiled frames are exported to as a Chrome trace.
+            profile_csv_file (str): File the profiled frames are exported to as CSV.
+            replay_file (str): File the seed and commands of each game are recorded to when the
+                game ends or is closed, or None to disable recording.
             rows (int): Number of rows in the grid.
             cols (int): Number of columns in the grid.
             grid_size (tuple): Size of each grid cell (width, height).
             tower_cost (int): Cost to place a new tower.
             tower_upgrade_cost (int): Cost to upgrade a tower.
+            upgrade_cost_per_level (int): Cost of upgrading a tower, multiplied by its current level.
+            kill_reward (int): Money earned for every enemy killed.
             tower_sell_percentage (float): Percentage of the original cost received when selling a tower.
             enemy_path (list): Predefined paths for enemies to follow. Each path is a list of (x, y) coordinates.
             enemy_health_indicator (dict): Settings for enemy health indicators, including:
@@ -23,45 +47,64 @@ class Settings:
                 - 'width' (int): Width of the health bar in pixels.
                 - 'height' (int): Height of the health bar in pixels.
             tower_sprites (dict): Dictionary mapping tower types to their sprite file paths.
+            tower_upgrade_sprites (dict): Dictionary mapping tower types to their level 2 sprite file paths.
+            upgrade_arrow_sprite (str): File path for the upgrade arrow shown above affordable towers.
             enemy_sprite (str): File path for the default enemy sprite.
+            enemy_sprites (dict): Dictionary mapping enemy types to their sprite file paths.
             bullet_sprite (str): File path for the bullet sprite.
             background_image (str): File path for the background image.
+            asset_dir (str): Directory whose images are all decoded at startup, behind a loading screen.
+            loader_threads (int): Number of threads decoding the assets at startup.
+            preload_images (list): Sprite file paths loaded into the asset cache at startup.
+            rotating_sprites (list): (path, angle) pairs of the turret sprites that turn towards
+                their target; they are pre-rotated into atlases at startup.
+            rotation_steps (int): Number of pre-rotated angles per turret sprite.
             shoot_sound (str): File path for the sound played when a tower shoots.
             upgrade_sound (str): File path for the sound played when a tower is upgraded.
             sell_sound (str): File path for the sound played when a tower is sold.
             enemy_hit_sound (str): File path for the sound played when an enemy is hit.
             enemy_appear (str): File path for the sound played when an enemy spawns.
             background_music (str): File path for the background music.
+            sound_effects (dict): Dictionary mapping effect names to their sound file paths.
+            sound_channels (int): Number of mixer channels reserved for sound effects.
+            sound_voice_limits (dict): Maximum number of voices each effect may play at once.
+            sounds_per_frame (int): Maximum number of different effects started in one frame.
+            freeze_aura (dict): Aura of freezing towers, with the 'effect' name and its 'amount'.
+            freeze_debuff (dict): Timed debuff applied by freezing bullets on hit, with the 'effect' name,
+                its 'amount' and 'duration' in milliseconds, or None to disable it.
+            aura_stacking (dict): Stacking rule ('max' or 'add') used when several auras or debuffs
+                with the same effect name overlap.
+            waves_file (str): JSON file defining the enemy types and the waves.
+            endless_mode (bool): Whether endless waves of rising difficulty follow the scripted waves.
+            analytic_bullets (bool): Whether bullets hit their target at the impact tick computed when
+                they are fired, instead of hitting whatever enemy they touch in flight.
             starting_money (int): Initial amount of money available to the player.
             lives (int): Number of lives the player starts with.
-            tower_positions (list): List of available positions for placing towers, calculated
-                based on the grid size and grid dimensions.
+            tower_positions (list): List of available positions for placing towers, the centers
+                of the buildable cells of the map.
         """
-        self.screen_width = 1200
-        self.screen_height = 800
+        self.map_file = 'maps/default.json'
+        self.map_cache_dir = 'maps/cache'
         self.bg_color = (230, 230, 230)
-
-        self.rows = 10
-        self.cols = 15
-        self.grid_size = (64, 64)
+        self.fps = 60
+        self.max_render_fps = 144
+        self.max_ticks_per_frame = 5
+        self.dirty_rects = True
+        self.show_dirty_rects = False
+        self.full_redraw_ratio = 0.5
+        self.text_cache_size = 128
+        self.profiler_history = 120
+        self.profiler_frames = 3600
+        self.profile_trace_file = 'profiles/trace.json'
+        self.profile_csv_file = 'profiles/frames.csv'
+        self.replay_file = 'replays/last_game.json'
 
         self.tower_cost = 100
         self.tower_upgrade_cost = 150
+        self.upgrade_cost_per_level = 50
+        self.kill_reward = 20
         self.tower_sell_percentage = 0.75
 
-        self.enemy_path = [
-            [
-                (50, 380), (320, 380), (320, 190), (580, 190),
-                (580, 580), (900, 580), (900, 320), (1150, 320)
-            ],
-            [
-                (50, 260), (190, 260), (190, 320), (450, 320),
-                (450, 510), (700, 510), (700, 320), (1150, 320)
-            ],
-            [
-                (50, 575), (510, 575), (510, 255), (900, 255), (900, 320), (1150, 320)
-            ]
-        ]
         self.enemy_health_indicator = {'colors': [(0, 255, 0), (255, 255, 255)], 'width': 100, 'height': 10}
 
         self.tower_sprites = {
@@ -69,9 +112,34 @@ class Settings:
             'sniper': 'assets/towers/sniper_tower.png',
             'freezer': 'assets/towers/freezing_tower.png',
         }
+        self.tower_upgrade_sprites = {
+            'basic': 'assets/towers/basic_tower2.png',
+            'sniper': 'assets/towers/sniper_tower2.png',
+        }
+        self.upgrade_arrow_sprite = 'assets/towers/level_up.png'
         self.enemy_sprite = 'assets/enemies/basic_enemy.png'
+        self.enemy_sprites = {
+            'basic': 'assets/enemies/basic_enemy.png',
+            'fast': 'assets/enemies/fast_enemy.png',
+            'strong': 'assets/enemies/strong_enemy.png',
+        }
         self.bullet_sprite = 'assets/bullets/basic_bullet.png'
-        self.background_image = 'assets/backgrounds/game_background.png'
+        self.asset_dir = 'assets'
+        self.loader_threads = 4
+        self.preload_images = [
+            *self.tower_sprites.values(),
+            *self.tower_upgrade_sprites.values(),
+            self.upgrade_arrow_sprite,
+            *self.enemy_sprites.values(),
+            self.bullet_sprite,
+        ]
+        self.rotating_sprites = [
+            (self.tower_sprites['basic'], 0),
+            (self.tower_upgrade_sprites['basic'], 0),
+            (self.tower_sprites['sniper'], 90),
+            (self.tower_upgrade_sprites['sniper'], 0),
+        ]
+        self.rotation_steps = 64
 
         self.shoot_sound = 'assets/sounds/shoot.wav'
         self.upgrade_sound = 'assets/sounds/upgrade.wav'
@@ -79,9 +147,43 @@ class Settings:
         self.enemy_hit_sound = 'assets/sounds/enemy_hit.wav'
         self.enemy_appear = 'assets/sounds/enemy_appear.wav'
         self.background_music = 'assets/sounds/background_music.mp3'
+        self.sound_effects = {
+            'shoot': self.shoot_sound,
+            'upgrade': self.upgrade_sound,
+            'sell': self.sell_sound,
+            'enemy_hit': self.enemy_hit_sound,
+            'enemy_appear': self.enemy_appear,
+        }
+        self.sound_channels = 8
+        self.sound_voice_limits = {'shoot': 3, 'upgrade': 1, 'sell': 1, 'enemy_hit': 2, 'enemy_appear': 2}
+        self.sounds_per_frame = 3
+
+        self.freeze_aura = {'effect': 'slow', 'amount': 0.2}
+        self.freeze_debuff = None
+        self.aura_stacking = {'slow': 'max'}
+
+        self.waves_file = 'waves.json'
+        self.endless_mode = False
+        self.analytic_bullets = False
 
         self.starting_money = 500
         self.lives = 20
 
-        self.tower_positions = [(x * self.grid_size[0] + self.grid_size[0] // 2, y * self.grid_size[1] + self.grid_size[1] // 2)
-                                for x in range(1, self.cols) for y in range(3, self.rows)]
+        self.load_map(self.map_file)
+
+    def load_map(self, path):
+        """
+        Load a map and take the screen and grid size, paths, buildable cells and background from it.
+        The map is compiled into the cache directory the first time and whenever its source changes.
+        Args:
+            path (str): File path of the map source.
+        """
+        self.map_file = path
+        self.map = GameMap.load(path, self.map_cache_dir)
+        self.screen_width, self.screen_height = self.map.screen_size
+        self.cols = self.map.cols
+        self.rows = self.map.rows
+        self.grid_size = self.map.cell_size
+        self.background_image = self.map.background
+        self.enemy_path = self.map.paths
+        self.tower_positions = self.map.tower_positions
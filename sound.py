@@ -0,0 +1,108 @@
+import pygame
+
+
+class SoundBank:
+    """
+    Plays the game's sound effects through a fixed pool of reserved channels.
+    Every effect is decoded once at startup. Voices are capped per effect and
+    per frame, so a burst of simultaneous shots is merged into a single sound
+    instead of starting dozens of overlapping ones. When the mixer is not
+    available, or the bank is muted, playing a sound does nothing.
+    """
+    def __init__(self, settings, muted=False, assets=None):
+        """
+        Initialize the sound bank.
+        Args:
+            settings: Reference to the game's settings.
+            muted (bool, optional): Start without audio. Defaults to False.
+            assets (AssetManager, optional): Cache holding sounds decoded ahead of time.
+                Defaults to decoding every sound here.
+        Attributes:
+            enabled (bool): False when muted or when the mixer could not be initialized.
+            sounds (dict): Decoded sounds keyed by effect name.
+            channels (list): Reserved channels used to play the effects.
+            played (int): Number of sounds started.
+            dropped (int): Number of sounds skipped because of a voice or frame limit.
+        """
+        self.settings = settings
+        self.assets = assets
+        self.sounds = {}
+        self.channels = []
+        self.frame_effects = set()
+        self.played = 0
+        self.dropped = 0
+        self.enabled = not muted and self._init_mixer()
+        if self.enabled:
+            self._load()
+
+    @staticmethod
+    def _init_mixer():
+        """
+        Make sure the mixer is running.
+        Returns:
+            bool: True if the mixer is available, False otherwise.
+        """
+        if pygame.mixer.get_init():
+            return True
+        try:
+            pygame.mixer.init()
+        except pygame.error:
+            return False
+        return True
+
+    def _load(self):
+        """
+        Decode every sound effect and reserve the channel pool.
+        """
+        for name, path in self.settings.sound_effects.items():
+            self.sounds[name] = self.assets.sound(path) if self.assets else pygame.mixer.Sound(path)
+        count = self.settings.sound_channels
+        if pygame.mixer.get_num_channels() < count:
+            pygame.mixer.set_num_channels(count)
+        pygame.mixer.set_reserved(count)
+        self.channels = [pygame.mixer.Channel(i) for i in range(count)]
+
+    def begin_frame(self):
+        """
+        Reset the per-frame limits. Called once at the start of every rendered frame,
+        so all the ticks simulated in a frame share its limits.
+        """
+        self.frame_effects.clear()
+
+    def play(self, name):
+        """
+        Play a sound effect if the voice and frame limits allow it.
+        Args:
+            name (str): Name of the effect, a key of Settings.sound_effects.
+        Returns:
+            bool: True if the sound was started, False otherwise.
+        """
+        if not self.enabled:
+            return False
+        if name in self.frame_effects or len(self.frame_effects) >= self.settings.sounds_per_frame:
+            self.dropped += 1
+            return False
+        sound = self.sounds[name]
+        voices = 0
+        free_channel = None
+        for channel in self.channels:
+            if channel.get_busy():
+                if channel.get_sound() is sound:
+                    voices += 1
+            elif free_channel is None:
+                free_channel = channel
+        if free_channel is None or voices >= self.settings.sound_voice_limits.get(name, 1):
+            self.dropped += 1
+            return False
+        free_channel.play(sound)
+        self.frame_effects.add(name)
+        self.played += 1
+        return True
+
+    def stats(self):
+        """
+        Return playback statistics.
+        Returns:
+            dict: Whether audio is enabled, and the number of played and dropped sounds.
+        """
+        return {'enabled': self.enabled, 'played': self.played, 'dropped': self.dropped}
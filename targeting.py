@@ -0,0 +1,168 @@
+import math
+import weakref
+import numpy as np
+
+
+POLICIES = ('first', 'last', 'strongest', 'nearest')
+
+
+class TargetingIndex:
+    """
+    Answers in-range target queries of towers without scanning the enemies.
+    Towers never move, so the parts of every path a tower covers are computed
+    once as intervals of path keys (see PathTable) and cached until its range
+    changes. The live enemies are kept sorted by path key, which orders them
+    by path and then by progress, so the enemies in range of an interval are
+    a contiguous run found with two binary searches. Each policy then picks
+    its target from the run in logarithmic time:
+    'first' and 'last' take the ends of the run, 'nearest' searches around
+    the point of the segment closest to the tower, and 'strongest' uses a
+    sparse table of the healthiest enemy over every power-of-two run.
+    Ties go to the enemy that spawned first.
+    """
+    def __init__(self, level):
+        """
+        Initialize the targeting index.
+        Args:
+            level: Reference to the level owning the enemies and the compiled paths.
+        Attributes:
+            coverage (WeakKeyDictionary): For every tower, the range and number of paths the
+                intervals were computed for, and the start, end and closest keys of every interval.
+            version (int): Version of the enemy manager the sorted enemies were built from.
+            slots (ndarray): Enemy rows sorted by path key, then spawn order.
+            keys (ndarray): Path key of every enemy in that order.
+        """
+        self.level = level
+        self.coverage = weakref.WeakKeyDictionary()
+        self.version = None
+        self.slots = np.zeros(0, dtype=np.int64)
+        self.keys = np.zeros(0)
+        self._strongest = None
+
+    def tower_intervals(self, tower):
+        """
+        Return the path key intervals within a tower's range, computed on first use.
+        Args:
+            tower (Tower): The tower.
+        Returns:
+            list: (start, end, closest) keys of every covered interval.
+        """
+        paths = self.level.paths
+        cached = self.coverage.get(tower)
+        if cached and cached[0] == (tower.tower_range, len(paths.paths)):
+            return cached[1]
+        intervals = []
+        for base, compiled in zip(paths.base.tolist(), paths.compiled):
+            for low, high, closest in compiled.coverage(tower.position, tower.tower_range):
+                intervals.append((base + low, base + high, base + closest))
+        self.coverage[tower] = ((tower.tower_range, len(paths.paths)), intervals)
+        return intervals
+
+    def _refresh(self):
+        """
+        Sort the enemies by path key again if they changed since the last query.
+        """
+        manager = self.level.enemy_manager
+        if self.version == manager.version:
+            return
+        n = manager.count
+        keys = self.level.paths.base[manager.path_id[:n]] + manager.distance[:n]
+        self.slots = np.lexsort((manager.serial[:n], keys))
+        self.keys = keys[self.slots]
+        self.version = manager.version
+        self._strongest = None
+
+    def _strongest_table(self):
+        """
+        Return the sparse table of the healthiest enemy of every run of 2**k sorted enemies.
+        """
+        if self._strongest is None:
+            manager = self.level.enemy_manager
+            health = manager.health[self.slots]
+            serial = manager.serial[self.slots]
+            table = [np.arange(len(self.slots))]
+            span = 1
+            while span * 2 <= len(self.slots):
+                previous = table[-1]
+                first, second = previous[:-span], previous[span:]
+                better = (health[second] > health[first]) | ((health[second] == health[first]) &
+                                                             (serial[second] < serial[first]))
+                table.append(np.where(better, second, first))
+                span *= 2
+            self._strongest = (table, health, serial)
+        return self._strongest
+
+    def _strongest_in(self, low, high):
+        table, health, serial = self._strongest_table()
+        level = (high - low).bit_length() - 1
+        first, second = table[level][low].item(), table[level][high - (1 << level)].item()
+        if (health[second], -serial[second]) > (health[first], -serial[first]):
+            return second
+        return first
+
+    def occupied(self, starts, ends):
+        """
+        Tell which path key intervals hold at least one enemy, testing all of them at once.
+        A tower has a target exactly when one of its tower_intervals is occupied.
+        Args:
+            starts (ndarray): Start key of every interval.
+            ends (ndarray): End key of every interval.
+        Returns:
+            ndarray: For every interval, whether an enemy is inside.
+        """
+        self._refresh()
+        if not len(self.keys):
+            return np.zeros(len(starts), dtype=bool)
+        return (np.searchsorted(self.keys, ends, side='right') -
+                np.searchsorted(self.keys, starts, side='left')) > 0
+
+    def find(self, tower, policy='nearest'):
+        """
+        Find the target of a tower among the enemies within its range.
+        Args:
+            tower (Tower): The tower looking for a target.
+            policy (str, optional): One of POLICIES. Defaults to 'nearest'.
+        Returns:
+            Enemy: The target, or None if no enemy is in range.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown targeting policy '{policy}'")
+        self._refresh()
+        keys = self.keys
+        if not len(keys):
+            return None
+        manager = self.level.enemy_manager
+        lengths = self.level.paths.lengths
+        best = best_rank = None
+        for start, end, closest in self.tower_intervals(tower):
+            low = int(np.searchsorted(keys, start, side='left'))
+            high = int(np.searchsorted(keys, end, side='right'))
+            if low >= high:
+                continue
+            if policy == 'first':
+                candidates = [int(np.searchsorted(keys, keys[high - 1], side='left'))]
+            elif policy == 'last':
+                candidates = [low]
+            elif policy == 'strongest':
+                candidates = [self._strongest_in(low, high)]
+            else:
+                middle = int(np.searchsorted(keys, closest, side='left'))
+                candidates = [index for index in (middle - 1, middle) if low <= index < high]
+                if middle - 1 >= low:
+                    candidates[0] = int(np.searchsorted(keys, keys[middle - 1], side='left'))
+            for index in candidates:
+                slot = self.slots[index].item()
+                serial = manager.serial[slot].item()
+                if policy == 'first':
+                    rank = (lengths[manager.path_id[slot]] - manager.distance[slot], serial)
+                elif policy == 'last':
+                    rank = (manager.distance[slot] - lengths[manager.path_id[slot]], serial)
+                elif policy == 'strongest':
+                    rank = (-manager.health[slot], serial)
+                else:
+                    dx = manager.position[slot, 0] - tower.position.x
+                    dy = manager.position[slot, 1] - tower.position.y
+                    rank = (math.sqrt(dx * dx + dy * dy), serial)
+                if best_rank is None or rank < best_rank:
+                    best, best_rank = slot, rank
+        return None if best is None else manager.views[best]
@@ -0,0 +1,99 @@
+from collections import OrderedDict
+
+
+class TextCache:
+    """
+    Least-recently-used cache of rendered text surfaces.
+    Rendering text with a font is expensive compared to blitting, and the game
+    shows the same few strings frame after frame. Surfaces are keyed by font,
+    string, colour and antialiasing, and the least recently used one is dropped
+    once the cache is full.
+    """
+    def __init__(self, capacity=128):
+        """
+        Initialize the text cache.
+        Args:
+            capacity (int, optional): Maximum number of cached surfaces. Defaults to 128.
+        Attributes:
+            surfaces (OrderedDict): Cached surfaces, from least to most recently used.
+            hits (int): Number of renders served from the cache.
+            misses (int): Number of renders that had to draw the text.
+            evictions (int): Number of surfaces dropped to make room.
+        """
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, color, antialias=True):
+        """
+        Return the surface for a string, rendering it on the first request.
+        Args:
+            font (pygame.font.Font): Font to render with.
+            text (str): The string to render.
+            color (tuple): Text colour (RGB format).
+            antialias (bool, optional): Whether to antialias the text. Defaults to True.
+        Returns:
+            pygame.Surface: The shared rendered surface.
+        """
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def stats(self):
+        """
+        Return cache statistics.
+        Returns:
+            dict: Number of cached surfaces, hits, misses, evictions and the hit rate.
+        """
+        lookups = self.hits + self.misses
+        return {'cached': len(self.surfaces), 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'hit_rate': self.hits / lookups if lookups else 0.0}
+
+
+class TextWidget:
+    """
+    A line of HUD text showing one value, re-rendered only when the value changes.
+    """
+    def __init__(self, cache, font, template, position, color=(255, 255, 255)):
+        """
+        Initialize the widget.
+        Args:
+            cache (TextCache): Cache used to render the text.
+            font (pygame.font.Font): Font to render with.
+            template (str): Format string with one {} placeholder for the value.
+            position (tuple): Top-left corner of the text on the screen (x, y).
+            color (tuple, optional): Text colour (RGB format). Defaults to white.
+        """
+        self.cache = cache
+        self.font = font
+        self.template = template
+        self.position = position
+        self.color = color
+        self.value = None
+        self.surface = None
+
+    def draw(self, screen, value):
+        """
+        Draw the widget showing the given value.
+        Args:
+            screen: The game screen to draw on.
+            value: The value to show.
+        Returns:
+            pygame.Rect: Screen region drawn on.
+        """
+        if self.surface is None or value != self.value:
+            self.value = value
+            self.surface = self.cache.render(self.font, self.template.format(value), self.color)
+        return screen.blit(self.surface, self.position)
@@ -1,6 +1,6 @@
 import pygame
-from bullet import Bullet
 import math
+from targeting import POLICIES
 
 
 class Tower(pygame.sprite.Sprite):
@@ -8,6 +8,10 @@ class Tower(pygame.sprite.Sprite):
     Base class for all tower types in the game.
     Towers can attack enemies, be upgraded, and display their information.
     """
+    upgrade_arrow_offset = (30, -30)
+    base_range = 0
+    targeting = 'nearest'
+
     def __init__(self, position, game):
         super().__init__()
         self.position = pygame.math.Vector2(position)
@@ -15,53 +19,91 @@ class Tower(pygame.sprite.Sprite):
 
         self.image = None
         self.rect = None
-        self.tower_range = 0
+        self.tower_range = self.base_range
         self.damage = 0
         self.rate_of_fire = 0
-        self.last_shot_time = pygame.time.get_ticks()
+        self.last_shot_time = game.sim_clock.get_ticks()
         self.level = 1
         self.original_image = self.image
+        self.atlas = None
+        self.atlas_rects = None
         self.upgrade_arrow_rect = None
+        self.aura = None
+        self.damage_dealt = 0
+
+    def set_atlas(self, path, angle=0):
+        """
+        Use the pre-rotated atlas of a sprite to turn the tower.
+        Args:
+            path (str): File path of the turret sprite.
+            angle (float, optional): Rotation the sprite is loaded with. Defaults to 0.
+        """
+        self.atlas = self.game.assets.rotation_atlas(path, self.game.settings.rotation_steps, angle)
+        self.atlas_rects = [image.get_rect(center=self.position) for image in self.atlas]
+
+    @staticmethod
+    def upgrade_cost_at(settings, level):
+        """
+        Return the upgrade cost of a tower of the given level, as shown to the player.
+        """
+        return settings.upgrade_cost_per_level * level
 
     def upgrade_cost(self):
-        return 50 * self.level
+        return self.upgrade_cost_at(self.game.settings, self.level)
 
-    def draw(self, screen):
+    @classmethod
+    def upgrades_cost(cls, settings, upgrades):
+        """
+        Return the money charged for upgrading a new tower a number of times.
+        Upgrade raises the level before charging, so the upgrade from level n
+        costs upgrade_cost_at(n + 1).
+        Args:
+            settings (Settings): Settings of the game.
+            upgrades (int): Number of upgrades.
+        Returns:
+            int: Total cost of the upgrades.
+        """
+        return sum(cls.upgrade_cost_at(settings, level + 1) for level in range(1, upgrades + 1))
+
+    def draw(self, screen, hovered=False):
         """
         Draw the tower on the screen, including upgrade options.
         Args:
             screen: The game screen to draw on.
+            hovered (bool, optional): Whether the mouse is over the tower. Defaults to False.
+        Returns:
+            list: Screen regions drawn on.
         """
-        mouse_pos = pygame.mouse.get_pos()
-        if self.is_hovered(mouse_pos):
-            level_text = self.game.font.render(f"Level: {self.level}", True, (255, 255, 255))
-            upgrade_cost_text = self.game.font.render(f"Upgrade: ${self.upgrade_cost()  }", True, (255, 255, 255))
+        rects = []
+        if hovered:
+            level_text = self.game.text.render(self.game.font, f"Level: {self.level}", (255, 255, 255))
+            upgrade_cost_text = self.game.text.render(self.game.font, f"Upgrade: ${self.upgrade_cost()}", (255, 255, 255))
 
             level_text_pos = (self.position.x, self.position.y + 20)
             upgrade_cost_pos = (self.position.x, self.position.y + 40)
 
-            screen.blit(level_text, level_text_pos)
-            screen.blit(upgrade_cost_text, upgrade_cost_pos)
+            rects.append(screen.blit(level_text, level_text_pos))
+            rects.append(screen.blit(upgrade_cost_text, upgrade_cost_pos))
         if self.game.settings.starting_money > self.upgrade_cost() and self.level < 2:
-            upgrade_arrow_img = pygame.image.load('assets/towers/level_up.png').convert_alpha()
-            self.upgrade_arrow_rect = upgrade_arrow_img.get_rect(center=(self.position.x + 30, self.position.y - 30))
-            screen.blit(upgrade_arrow_img, self.upgrade_arrow_rect)
+            upgrade_arrow_img = self.game.assets.image(self.game.settings.upgrade_arrow_sprite)
+            self.upgrade_arrow_rect = upgrade_arrow_img.get_rect(center=self.position + self.upgrade_arrow_offset)
+            rects.append(screen.blit(upgrade_arrow_img, self.upgrade_arrow_rect))
+        return rects
 
-    def update(self, enemies, current_time, bullets_group):
+    def update(self, current_time, bullets):
         """
         Update the tower's state, including attacking enemies.
         Args:
-            enemies (list): List of enemies on the field.
             current_time (int): Current game time in milliseconds.
-            bullets_group (pygame.sprite.Group): Group to add bullets to.
+            bullets (BulletManager): Storage to fire bullets into.
         """
         if current_time - self.last_shot_time > self.rate_of_fire:
-            target = self.find_target(enemies)
+            target = self.find_target()
             if target:
                 if not isinstance(self, FreezingTower):
                     self.rotate_towards_target(target)
-                    pygame.mixer.Sound(self.game.settings.shoot_sound).play()
-                self.shoot(target, bullets_group)
+                    self.game.sounds.play('shoot')
+                self.shoot(target, bullets)
                 self.last_shot_time = current_time
 
     def is_hovered(self, mouse_pos):
@@ -74,19 +116,20 @@ class Tower(pygame.sprite.Sprite):
         """
         return self.rect.collidepoint(mouse_pos)
 
-    def shoot(self, target, bullets_group):
+    def shoot(self, target, bullets):
         """
         Shoot a bullet at a target enemy.
         This method is meant to be overridden by subclasses.
         Args:
             target: The enemy being targeted.
-            bullets_group (pygame.sprite.Group): Group to add bullets to.
+            bullets (BulletManager): Storage to fire bullets into.
         """
         pass
 
     def rotate_towards_target(self, target):
         """
         Rotate the tower's image to face the target.
+        Towers with a rotation atlas show its image at the nearest angle step.
         Args:
             target: The enemy being targeted.
         """
@@ -97,25 +140,28 @@ class Tower(pygame.sprite.Sprite):
         # Преобразуем радианы в градусы
         angle_deg = math.degrees(angle_rad)
         angle_deg = -angle_deg - 90
-        self.image = pygame.transform.rotate(self.original_image, angle_deg)
-        self.rect = self.image.get_rect(center=self.position)
+        if self.atlas is None:
+            self.image = pygame.transform.rotate(self.original_image, angle_deg)
+            self.rect = self.image.get_rect(center=self.position)
+            return
+        step = round(angle_deg * len(self.atlas) / 360) % len(self.atlas)
+        self.image = self.atlas[step]
+        self.rect = self.atlas_rects[step]
 
-    def find_target(self, enemies):
+    def find_target(self):
         """
-        Find the nearest enemy within the tower's range.
-        Args:
-            enemies (list): List of enemies on the field.
+        Find the enemy to shoot among those within the tower's range, according to its targeting policy.
+        The lookup goes through the level's targeting index instead of scanning the enemies.
         Returns:
-            Enemy: The closest enemy within range, or None if no enemy is found.
+            Enemy: The chosen enemy within range, or None if no enemy is found.
         """
-        nearest_enemy = None
-        min_distance = float('inf')
-        for enemy in enemies:
-            distance = self.position.distance_to(enemy.position)
-            if distance < min_distance and distance <= self.tower_range:
-                nearest_enemy = enemy
-                min_distance = distance
-        return nearest_enemy
+        return self.game.level.targeting.find(self, self.targeting)
+
+    def cycle_targeting(self):
+        """
+        Switch the tower to the next targeting policy.
+        """
+        self.targeting = POLICIES[(POLICIES.index(self.targeting) + 1) % len(POLICIES)]
 
     def upgrade(self, tower):
         """
@@ -129,19 +175,24 @@ class Tower(pygame.sprite.Sprite):
             tower.damage *= 1.2
             tower.rate_of_fire *= 0.8
         if isinstance(tower, BasicTower):
-            tower.image = pygame.image.load('assets/towers/basic_tower2.png').convert_alpha()
+            tower.image = self.game.assets.image(self.game.settings.tower_upgrade_sprites['basic'])
             tower.original_image = tower.image
+            tower.set_atlas(self.game.settings.tower_upgrade_sprites['basic'])
         if isinstance(tower, SniperTower):
-            tower.image = pygame.image.load('assets/towers/sniper_tower2.png').convert_alpha()
+            tower.image = self.game.assets.image(self.game.settings.tower_upgrade_sprites['sniper'])
             tower.original_image = tower.image
+            tower.set_atlas(self.game.settings.tower_upgrade_sprites['sniper'])
         if isinstance(tower, FreezingTower):
             tower.tower_range *= 1.2
+        self.game.level.tower_changed(tower)
 
 
 class BasicTower(Tower):
     """
     Basic tower with moderate range and damage.
     """
+    base_range = 150
+
     def __init__(self, position, game):
         """
         Initialize a Basic Tower.
@@ -150,28 +201,31 @@ class BasicTower(Tower):
             game: Reference to the main game instance.
         """
         super().__init__(position, game)
-        self.image = pygame.image.load('assets/towers/basic_tower.png').convert_alpha()
+        self.image = game.assets.image(game.settings.tower_sprites['basic'])
         self.original_image = self.image
         self.rect = self.image.get_rect(center=self.position)
-        self.tower_range = 150
+        self.set_atlas(game.settings.tower_sprites['basic'])
+        self.tower_range = self.base_range
         self.damage = 20
         self.rate_of_fire = 1000
 
-    def shoot(self, target, bullets_group):
+    def shoot(self, target, bullets):
         """
        Shoot a bullet at a target enemy.
        Args:
            target: The enemy being targeted.
-           bullets_group (pygame.sprite.Group): Group to add bullets to.
+           bullets (BulletManager): Storage to fire bullets into.
        """
-        new_bullet = Bullet(self.position, target.position, self.damage, self.game)
-        bullets_group.add(new_bullet)
+        bullets.fire(self.position, target.position, self.damage, tower=self, enemy=target)
 
 
 class SniperTower(Tower):
     """
-    Long-range tower with high damage, targeting the healthiest enemy.
+    Long-range tower with high damage, targeting the strongest enemy in range by default.
     """
+    base_range = 300
+    targeting = 'strongest'
+
     def __init__(self, position, game):
         """
         Initialize a Sniper Tower.
@@ -180,45 +234,30 @@ class SniperTower(Tower):
             game: Reference to the main game instance.
         """
         super().__init__(position, game)
-        self.image = pygame.image.load('assets/towers/sniper_tower.png').convert_alpha()
-        self.image = pygame.transform.rotate(self.image, 90)
+        self.image = game.assets.image(game.settings.tower_sprites['sniper'], angle=90)
         self.original_image = self.image
         self.rect = self.image.get_rect(center=self.position)
-        self.tower_range = 300
+        self.set_atlas(game.settings.tower_sprites['sniper'], angle=90)
+        self.tower_range = self.base_range
         self.damage = 40
         self.rate_of_fire = 2000
 
-    def find_target(self, enemies):
-        """
-        Find the healthiest enemy within the tower's range.
-        Args:
-            enemies (list): List of enemies on the field.
-        Returns:
-            Enemy: The healthiest enemy within range, or None if no enemy is found.
-        """
-        healthiest_enemy = None
-        max_health = 0
-        for enemy in enemies:
-            if self.position.distance_to(enemy.position) <= self.tower_range and enemy.health > max_health:
-                healthiest_enemy = enemy
-                max_health = enemy.health
-        return healthiest_enemy
-
-    def shoot(self, target, bullets_group):
+    def shoot(self, target, bullets):
         """
        Shoot a bullet at a target enemy.
        Args:
            target: The enemy being targeted.
-           bullets_group (pygame.sprite.Group): Group to add bullets to.
+           bullets (BulletManager): Storage to fire bullets into.
        """
-        new_bullet = Bullet(self.position, target.position, self.damage, self.game)
-        bullets_group.add(new_bullet)
+        bullets.fire(self.position, target.position, self.damage, tower=self, enemy=target)
 
 
 class FreezingTower(Tower):
     """
     Tower that slows enemies instead of dealing high damage.
     """
+    base_range = 50
+
     def __init__(self, position, game):
         """
         Initialize a Freezing Tower.
@@ -227,20 +266,23 @@ class FreezingTower(Tower):
             game: Reference to the main game instance.
         """
         super().__init__(position, game)
-        self.image = pygame.image.load('assets/towers/freezing_tower.png').convert_alpha()
+        self.image = game.assets.image(game.settings.tower_sprites['freezer'])
         self.original_image = self.image
         self.rect = self.image.get_rect(center=self.position)
-        self.tower_range = 50
+        self.tower_range = self.base_range
         self.damage = 5
         self.rate_of_fire = 2000
+        self.aura = game.settings.freeze_aura
 
-    def shoot(self, target, bullets_group):
+    def shoot(self, target, bullets):
         """
         Shoot a freezing bullet at a target enemy.
         Args:
             target: The enemy being targeted.
-            bullets_group (pygame.sprite.Group): Group to add bullets to.
+            bullets (BulletManager): Storage to fire bullets into.
         """
-        new_bullet = Bullet(self.position, target.position, self.damage, self.game, tower=self)
-        bullets_group.add(new_bullet)
+        bullets.fire(self.position, target.position, self.damage, tower=self,
+                     effect=self.game.settings.freeze_debuff, enemy=target)
+
 
+TOWER_CLASSES = {'basic': BasicTower, 'sniper': SniperTower, 'freezer': FreezingTower}
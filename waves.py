@@ -0,0 +1,135 @@
+import itertools
+import json
+
+
+def curve(spec, step):
+    """
+    Evaluate a scaling curve.
+    A curve is either a constant or a dict with 'base', 'per_wave' (added every
+    wave), 'growth' (multiplied every wave) and optional 'min' and 'max' bounds.
+    Args:
+        spec (float or dict): The curve.
+        step (int): Number of waves since the curve started applying.
+    Returns:
+        float: Value of the curve at that step.
+    """
+    if not isinstance(spec, dict):
+        return spec
+    value = (spec.get('base', 0) + spec.get('per_wave', 0) * step) * spec.get('growth', 1) ** step
+    if 'max' in spec:
+        value = min(value, spec['max'])
+    if 'min' in spec:
+        value = max(value, spec['min'])
+    return value
+
+
+class Wave:
+    """
+    One wave of enemies, ready to spawn.
+    """
+    def __init__(self, number, path, enemies, spawn_interval):
+        """
+        Initialize the wave.
+        Args:
+            number (int): Index of the wave, starting at 0.
+            path (list): The path the enemies of the wave follow.
+            enemies (list): Keyword arguments of every enemy to spawn, in order.
+            spawn_interval (int): Time between two spawns in milliseconds.
+        """
+        self.number = number
+        self.path = path
+        self.enemies = enemies
+        self.spawn_interval = spawn_interval
+
+    def __len__(self):
+        return len(self.enemies)
+
+
+class WaveStream:
+    """
+    Produces the waves of a level one at a time from a wave definition file.
+    The file lists the enemy types, the scripted waves with their enemy mix and
+    count, and optionally an endless section whose values are scaling curves.
+    A wave is only built when the level asks for it, so however long the
+    session runs, only the current wave is held in memory. Without endless mode
+    the stream ends after the scripted waves; with it, endless waves follow
+    forever with rising difficulty.
+    """
+    def __init__(self, definition, rng, paths, sprites, endless=False):
+        """
+        Initialize the wave stream.
+        Args:
+            definition (dict): The wave definition, as loaded from a wave file.
+            rng (random.Random): Random generator choosing paths and enemies.
+            paths (list): The enemy paths waves may use.
+            sprites (dict): Sprite file paths by enemy sprite name.
+            endless (bool, optional): Whether endless waves follow the scripted ones. Defaults to False.
+        Attributes:
+            enemy_types (dict): Speed, health and sprite of every enemy type.
+            total (int): Number of waves, or None in endless mode.
+        """
+        self.enemy_types = definition['enemies']
+        self.scripted = definition['waves']
+        self.spawn_interval = definition.get('spawn_interval', 1000)
+        self.endless = definition.get('endless') if endless else None
+        if endless and not self.endless:
+            raise ValueError("The wave definition has no 'endless' section")
+        self.rng = rng
+        self.paths = paths
+        self.sprites = sprites
+        self.total = None if self.endless else len(self.scripted)
+        self._waves = self._generate()
+
+    @classmethod
+    def load(cls, path, rng, paths, sprites, endless=False):
+        """
+        Create a wave stream from a JSON wave file.
+        Args:
+            path (str): File path of the wave definition.
+        Returns:
+            WaveStream: The stream; the other arguments are passed to the constructor.
+        """
+        with open(path) as file:
+            return cls(json.load(file), rng, paths, sprites, endless)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._waves)
+
+    def _generate(self):
+        for number, spec in enumerate(self.scripted):
+            yield self._build(number, spec, 0)
+        if self.endless:
+            for step in itertools.count():
+                yield self._build(len(self.scripted) + step, self.endless, step)
+
+    def _build(self, number, spec, step):
+        """
+        Build one wave from its definition.
+        Args:
+            number (int): Index of the wave.
+            spec (dict): Definition of the wave.
+            step (int): Step at which the curves of the definition are evaluated.
+        Returns:
+            Wave: The wave.
+        """
+        choice = spec.get('path', 'random')
+        path = self.rng.choice(self.paths) if choice == 'random' else self.paths[choice]
+        names = list(self.enemy_types)
+        weights = [curve(spec['mix'].get(name, 0), step) for name in names]
+        count = int(curve(spec['count'], step))
+        health_scale = curve(spec.get('health_scale', 1), step)
+        speed_scale = curve(spec.get('speed_scale', 1), step)
+        enemies = []
+        for name in self.rng.choices(names, weights=weights, k=count):
+            enemy_type = self.enemy_types[name]
+            enemies.append({
+                'path': path,
+                'speed': enemy_type['speed'] * speed_scale,
+                'health': enemy_type['health'] * health_scale,
+                'image_path': self.sprites[enemy_type['sprite']],
+            })
+        spawn_interval = curve(spec.get('spawn_interval', self.spawn_interval), step)
+        return Wave(number, path, enemies, spawn_interval)